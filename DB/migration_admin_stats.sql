@@ -0,0 +1,21 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Admin dashboard counters in one round trip
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- Called by the backend's background refresh (services/admin_stats.py),
+-- never on the request path.
+CREATE OR REPLACE FUNCTION admin_dashboard_stats()
+RETURNS jsonb LANGUAGE sql STABLE SECURITY DEFINER AS $$
+  SELECT jsonb_build_object(
+    'pending_reviews', (SELECT count(*) FROM public.items WHERE moderation_status = 'pending_review'),
+    'open_reports',    (SELECT count(*) FROM public.reports WHERE status = 'open'),
+    'suspended_users', (SELECT count(*) FROM public.profiles WHERE suspended_at IS NOT NULL),
+    'total_items',     (SELECT count(*) FROM public.items WHERE deleted_at IS NULL),
+    'total_users',     (SELECT count(*) FROM public.profiles)
+  );
+$$;
+
+REVOKE EXECUTE ON FUNCTION admin_dashboard_stats() FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,62 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Conversation list delta sync
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- 1. Change watermark on conversations: bumped on every update
+--    (new message, status change, unread counter reset, …)
+ALTER TABLE public.conversations
+  ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now();
+
+UPDATE public.conversations
+  SET updated_at = COALESCE(last_message_at, created_at)
+  WHERE updated_at IS NULL;
+
+CREATE OR REPLACE FUNCTION touch_conversation_updated_at()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_conversation_update ON public.conversations;
+CREATE TRIGGER on_conversation_update
+  BEFORE UPDATE ON public.conversations
+  FOR EACH ROW EXECUTE FUNCTION touch_conversation_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON public.conversations(updated_at);
+
+-- 2. Tombstones for deleted conversations (unmatch), so clients holding
+--    a cached inbox can drop them on their next delta sync
+CREATE TABLE IF NOT EXISTS public.conversation_tombstones (
+  conversation_id uuid PRIMARY KEY,
+  user1_id   uuid NOT NULL,
+  user2_id   uuid NOT NULL,
+  deleted_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+ALTER TABLE public.conversation_tombstones ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Participants can view tombstones" ON public.conversation_tombstones;
+CREATE POLICY "Participants can view tombstones" ON public.conversation_tombstones FOR SELECT
+  USING (auth.uid() = user1_id OR auth.uid() = user2_id);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_tombstones_user1 ON public.conversation_tombstones(user1_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_conversation_tombstones_user2 ON public.conversation_tombstones(user2_id, deleted_at);
+
+CREATE OR REPLACE FUNCTION record_conversation_tombstone()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  INSERT INTO public.conversation_tombstones (conversation_id, user1_id, user2_id)
+    VALUES (OLD.id, OLD.user1_id, OLD.user2_id)
+    ON CONFLICT (conversation_id) DO UPDATE SET deleted_at = now();
+  RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_conversation_delete ON public.conversations;
+CREATE TRIGGER on_conversation_delete
+  AFTER DELETE ON public.conversations
+  FOR EACH ROW EXECUTE FUNCTION record_conversation_tombstone();
+
+NOTIFY pgrst, 'reload schema';
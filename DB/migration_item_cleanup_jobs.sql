@@ -0,0 +1,54 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Background cascade for admin item deletion
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- delete_item_admin hides the item and records a cleanup job; API workers
+-- then remove the item's wishlists / swipes rows in bounded batches.
+-- Progress is written after every batch, so a job interrupted by a restart
+-- resumes where it stopped (deleting is idempotent).
+CREATE TABLE IF NOT EXISTS public.item_cleanup_jobs (
+  id           uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  item_id      uuid NOT NULL,
+  requested_by uuid REFERENCES public.profiles(id) ON DELETE SET NULL,
+  status       text NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+  progress     jsonb NOT NULL DEFAULT '{}'::jsonb,   -- { "wishlists": <rows deleted>, "swipes": <rows deleted> }
+  error        text,
+  created_at   timestamp with time zone DEFAULT now() NOT NULL,
+  started_at   timestamp with time zone,
+  heartbeat_at timestamp with time zone,
+  finished_at  timestamp with time zone
+);
+
+-- Backend-only (service role); no client policies
+ALTER TABLE public.item_cleanup_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_item_cleanup_jobs_status ON public.item_cleanup_jobs(status, created_at);
+
+-- Deletes at most batch_size rows referencing the item from one table and
+-- returns how many went. Index-backed, so every batch is a short transaction.
+CREATE OR REPLACE FUNCTION cleanup_item_batch(target_item uuid, target_table text, batch_size integer)
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  removed integer;
+BEGIN
+  IF target_table = 'wishlists' THEN
+    DELETE FROM public.wishlists
+      WHERE id IN (SELECT id FROM public.wishlists WHERE item_id = target_item LIMIT batch_size);
+  ELSIF target_table = 'swipes' THEN
+    DELETE FROM public.swipes
+      WHERE id IN (SELECT id FROM public.swipes WHERE item_id = target_item LIMIT batch_size);
+  ELSE
+    RAISE EXCEPTION 'Unsupported cleanup table %', target_table;
+  END IF;
+  GET DIAGNOSTICS removed = ROW_COUNT;
+  RETURN removed;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION cleanup_item_batch(uuid, text, integer) FROM PUBLIC, anon, authenticated;
+
+CREATE INDEX IF NOT EXISTS idx_wishlists_item_id ON public.wishlists(item_id);
+CREATE INDEX IF NOT EXISTS idx_swipes_item_id ON public.swipes(item_id);
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,26 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Perceptual hashes of item photos
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- One 64-bit dHash per item photo (16 hex chars), written by create_item.
+-- API workers mirror this table into an in-memory BK-tree for Hamming
+-- distance lookups; created_at is the watermark they catch up from.
+CREATE TABLE IF NOT EXISTS public.item_image_hashes (
+  item_id     uuid NOT NULL REFERENCES public.items(id) ON DELETE CASCADE,
+  image_index integer NOT NULL,
+  owner_id    uuid NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+  image_url   text NOT NULL,
+  dhash       text NOT NULL CHECK (dhash ~ '^[0-9a-f]{16}$'),
+  created_at  timestamp with time zone DEFAULT now() NOT NULL,
+  PRIMARY KEY (item_id, image_index)
+);
+
+-- Backend-only (service role); no client policies
+ALTER TABLE public.item_image_hashes ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_item_image_hashes_created_at ON public.item_image_hashes(created_at);
+-- Exact-copy lookups straight from SQL
+CREATE INDEX IF NOT EXISTS idx_item_image_hashes_dhash ON public.item_image_hashes(dhash);
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,37 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Retries for background jobs, atomic admin item deletion
+-- Run this in the Supabase SQL Editor (after migration_verification_jobs.sql
+-- and migration_item_cleanup_jobs.sql)
+-- ═══════════════════════════════════════════════════════════════
+
+-- Both job tables are worked by services/job_runner.py: a run that fails
+-- goes back to 'queued' with retry_at pushed out exponentially, and is only
+-- marked 'failed' once attempts reaches the runner's limit.
+ALTER TABLE public.verification_jobs ADD COLUMN IF NOT EXISTS attempts integer NOT NULL DEFAULT 0;
+ALTER TABLE public.verification_jobs ADD COLUMN IF NOT EXISTS retry_at timestamp with time zone;
+ALTER TABLE public.item_cleanup_jobs ADD COLUMN IF NOT EXISTS attempts integer NOT NULL DEFAULT 0;
+ALTER TABLE public.item_cleanup_jobs ADD COLUMN IF NOT EXISTS retry_at timestamp with time zone;
+
+-- Hides the item and records its cleanup job in one transaction, so an
+-- item is never left deleted without the job that removes its wishlists /
+-- swipes rows. Returns the job row (null if the item does not exist).
+CREATE OR REPLACE FUNCTION admin_delete_item(target_item uuid, actor_id uuid)
+RETURNS jsonb LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  job public.item_cleanup_jobs;
+BEGIN
+  UPDATE public.items SET deleted_at = COALESCE(deleted_at, now()), status = 'deleted'
+    WHERE id = target_item;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+  INSERT INTO public.item_cleanup_jobs (item_id, requested_by, progress)
+    VALUES (target_item, actor_id, '{"wishlists": 0, "swipes": 0}'::jsonb)
+    RETURNING * INTO job;
+  RETURN to_jsonb(job);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION admin_delete_item(uuid, uuid) FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,20 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Buffered moderation_log writes
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- The backend now buffers audit entries and writes them in batches
+-- (services/audit_log.py). Entries carry a client-generated id and
+-- created_at (the time of the action, not of the flush), and batches are
+-- inserted with ON CONFLICT (id) DO NOTHING so a replayed spool can't
+-- duplicate rows.
+
+-- Role changes were logged with an action type the CHECK constraint
+-- rejected; allow it so one entry can't fail a whole batch.
+ALTER TABLE public.moderation_log DROP CONSTRAINT IF EXISTS moderation_log_action_type_check;
+ALTER TABLE public.moderation_log ADD CONSTRAINT moderation_log_action_type_check
+  CHECK (action_type IN ('approve', 'reject', 'delete', 'flag_resolved', 'user_suspended', 'user_role_changed'));
+
+CREATE INDEX IF NOT EXISTS idx_moderation_log_created_at ON public.moderation_log(created_at DESC);
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,146 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Maintained profile aggregates
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- profiles already carries items_listed / items_swapped / wishlist_count /
+-- rating. Those columns are now maintained by triggers on the source tables
+-- (instead of being recomputed with count queries on every profile read),
+-- and rating_sum / rating_count are added so the average stays exact.
+
+-- 1. Rating aggregates
+ALTER TABLE public.profiles
+  ADD COLUMN IF NOT EXISTS rating_sum   integer DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS rating_count integer DEFAULT 0;
+
+-- 2. Items → items_listed / items_swapped
+CREATE OR REPLACE FUNCTION maintain_profile_item_stats()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.profiles
+      SET items_listed  = COALESCE(items_listed, 0) + 1,
+          items_swapped = COALESCE(items_swapped, 0) + (NEW.status IS NOT DISTINCT FROM 'swapped')::int
+      WHERE id = NEW.owner_id;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE public.profiles
+      SET items_listed  = GREATEST(COALESCE(items_listed, 0) - 1, 0),
+          items_swapped = GREATEST(COALESCE(items_swapped, 0) - (OLD.status IS NOT DISTINCT FROM 'swapped')::int, 0)
+      WHERE id = OLD.owner_id;
+  ELSIF OLD.status IS DISTINCT FROM NEW.status
+        AND (OLD.status = 'swapped' OR NEW.status = 'swapped') THEN
+    UPDATE public.profiles
+      SET items_swapped = GREATEST(COALESCE(items_swapped, 0)
+                                   + (NEW.status IS NOT DISTINCT FROM 'swapped')::int
+                                   - (OLD.status IS NOT DISTINCT FROM 'swapped')::int, 0)
+      WHERE id = NEW.owner_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_item_stats_change ON public.items;
+CREATE TRIGGER on_item_stats_change
+  AFTER INSERT OR DELETE OR UPDATE OF status ON public.items
+  FOR EACH ROW EXECUTE FUNCTION maintain_profile_item_stats();
+
+-- 3. Wishlists → wishlist_count
+--    Only rows actually inserted/deleted fire, so duplicate saves no longer
+--    drift the counter. The increment/decrement RPCs are kept for old clients.
+CREATE OR REPLACE FUNCTION maintain_profile_wishlist_stats()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.profiles SET wishlist_count = COALESCE(wishlist_count, 0) + 1 WHERE id = NEW.user_id;
+  ELSE
+    UPDATE public.profiles SET wishlist_count = GREATEST(COALESCE(wishlist_count, 0) - 1, 0) WHERE id = OLD.user_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_wishlist_stats_change ON public.wishlists;
+CREATE TRIGGER on_wishlist_stats_change
+  AFTER INSERT OR DELETE ON public.wishlists
+  FOR EACH ROW EXECUTE FUNCTION maintain_profile_wishlist_stats();
+
+-- 4. Reviews → rating_sum / rating_count / rating
+CREATE OR REPLACE FUNCTION maintain_profile_review_stats()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.profiles
+      SET rating_sum   = COALESCE(rating_sum, 0) + NEW.rating,
+          rating_count = COALESCE(rating_count, 0) + 1,
+          rating       = round((COALESCE(rating_sum, 0) + NEW.rating)::numeric / (COALESCE(rating_count, 0) + 1), 1)
+      WHERE id = NEW.reviewee_id;
+  ELSE
+    UPDATE public.profiles
+      SET rating_sum   = GREATEST(COALESCE(rating_sum, 0) - OLD.rating, 0),
+          rating_count = GREATEST(COALESCE(rating_count, 0) - 1, 0),
+          rating       = CASE WHEN COALESCE(rating_count, 0) - 1 > 0
+                              THEN round((rating_sum - OLD.rating)::numeric / (rating_count - 1), 1)
+                              ELSE 0 END
+      WHERE id = OLD.reviewee_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_review_stats_change ON public.reviews;
+CREATE TRIGGER on_review_stats_change
+  AFTER INSERT OR DELETE ON public.reviews
+  FOR EACH ROW EXECUTE FUNCTION maintain_profile_review_stats();
+
+-- 5. Reconciliation — recomputes every aggregate from the source tables and
+--    fixes rows that drifted (manual edits, rows written before the triggers
+--    existed). Returns the number of profiles corrected.
+CREATE OR REPLACE FUNCTION reconcile_profile_stats()
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  fixed integer;
+BEGIN
+  WITH actual AS (
+    SELECT
+      p.id,
+      COALESCE(i.listed, 0)  AS items_listed,
+      COALESCE(i.swapped, 0) AS items_swapped,
+      COALESCE(w.saved, 0)   AS wishlist_count,
+      COALESCE(r.total, 0)   AS rating_sum,
+      COALESCE(r.n, 0)       AS rating_count
+    FROM public.profiles p
+    LEFT JOIN (
+      SELECT owner_id, count(*) AS listed, count(*) FILTER (WHERE status = 'swapped') AS swapped
+      FROM public.items GROUP BY owner_id
+    ) i ON i.owner_id = p.id
+    LEFT JOIN (
+      SELECT user_id, count(*) AS saved FROM public.wishlists GROUP BY user_id
+    ) w ON w.user_id = p.id
+    LEFT JOIN (
+      SELECT reviewee_id, sum(rating) AS total, count(*) AS n FROM public.reviews GROUP BY reviewee_id
+    ) r ON r.reviewee_id = p.id
+  )
+  UPDATE public.profiles p
+    SET items_listed   = a.items_listed,
+        items_swapped  = a.items_swapped,
+        wishlist_count = a.wishlist_count,
+        rating_sum     = a.rating_sum,
+        rating_count   = a.rating_count,
+        rating         = CASE WHEN a.rating_count > 0 THEN round(a.rating_sum::numeric / a.rating_count, 1) ELSE 0 END
+    FROM actual a
+    WHERE p.id = a.id
+      AND (p.items_listed, p.items_swapped, p.wishlist_count, p.rating_sum, p.rating_count)
+          IS DISTINCT FROM (a.items_listed, a.items_swapped, a.wishlist_count, a.rating_sum, a.rating_count);
+
+  GET DIAGNOSTICS fixed = ROW_COUNT;
+  RETURN fixed;
+END;
+$$;
+
+-- 6. Backfill once
+SELECT reconcile_profile_stats();
+
+-- Full-table recompute: backend (service role) only
+REVOKE EXECUTE ON FUNCTION reconcile_profile_stats() FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,22 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Single-runner profile stats reconciliation
+-- Run this in the Supabase SQL Editor (after migration_review_histogram.sql)
+-- ═══════════════════════════════════════════════════════════════
+
+-- Every API process runs the reconciliation loop; only one full-table
+-- recompute should run at a time. The transaction-scoped advisory lock is
+-- released when the call returns (safe behind a connection pooler), and a
+-- process that doesn't get it skips this round: returns -1.
+CREATE OR REPLACE FUNCTION reconcile_profile_stats_exclusive()
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF NOT pg_try_advisory_xact_lock(hashtext('reconcile_profile_stats')) THEN
+    RETURN -1;
+  END IF;
+  RETURN reconcile_profile_stats();
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION reconcile_profile_stats_exclusive() FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,195 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Report deduplication and prioritized moderation queue
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- Reports are aggregated per target (item or user) into report_targets,
+-- maintained by triggers on reports, so a listing reported 500 times is one
+-- queue entry. Each report is weighted by its reporter's trust: the share
+-- of their past reports moderators upheld (Laplace-smoothed, so new
+-- reporters start at 0.5). The queue ranks targets by trust-weighted active
+-- reports, decayed by the age of the latest report.
+
+-- 1. Reporter trust
+CREATE TABLE IF NOT EXISTS public.reporter_stats (
+  reporter_id uuid PRIMARY KEY REFERENCES public.profiles(id) ON DELETE CASCADE,
+  upheld      integer NOT NULL DEFAULT 0,
+  dismissed   integer NOT NULL DEFAULT 0
+);
+ALTER TABLE public.reporter_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION reporter_trust(uid uuid)
+RETURNS numeric LANGUAGE sql STABLE AS $$
+  SELECT COALESCE((SELECT (upheld + 1)::numeric / (upheld + dismissed + 2)
+                   FROM public.reporter_stats WHERE reporter_id = uid), 0.5);
+$$;
+
+-- Trust is captured per report at insert time, so resolving later reports
+-- subtracts exactly what was added
+ALTER TABLE public.reports
+  ADD COLUMN IF NOT EXISTS reporter_trust numeric NOT NULL DEFAULT 0.5;
+
+-- One active report per reporter and target: repeat reports can't inflate a
+-- count. Existing repeats are closed as duplicates first (newest one kept).
+UPDATE public.reports
+  SET status = 'dismissed', action_taken = 'duplicate', resolved_at = now()
+  WHERE id IN (
+    SELECT id FROM (
+      SELECT id, row_number() OVER (
+               PARTITION BY reporter_id, reported_type, COALESCE(reported_item_id, reported_user_id)
+               ORDER BY created_at DESC) AS rn
+        FROM public.reports
+        WHERE status IN ('open', 'investigating')
+    ) ranked
+    WHERE rn > 1
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_one_active_per_reporter
+  ON public.reports (reporter_id, reported_type, COALESCE(reported_item_id, reported_user_id))
+  WHERE status IN ('open', 'investigating');
+
+-- 2. Aggregated targets
+CREATE TABLE IF NOT EXISTS public.report_targets (
+  target_type       text NOT NULL CHECK (target_type IN ('item', 'user')),
+  target_id         uuid NOT NULL,
+  active_count      integer NOT NULL DEFAULT 0,     -- open + investigating reports
+  total_count       integer NOT NULL DEFAULT 0,
+  trust_sum         numeric NOT NULL DEFAULT 0,     -- sum of reporter_trust over active reports
+  first_reported_at timestamp with time zone NOT NULL DEFAULT now(),
+  last_reported_at  timestamp with time zone NOT NULL DEFAULT now(),
+  PRIMARY KEY (target_type, target_id)
+);
+ALTER TABLE public.report_targets ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_report_targets_active
+  ON public.report_targets (last_reported_at DESC) WHERE active_count > 0;
+
+CREATE OR REPLACE FUNCTION set_report_trust()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  NEW.reporter_trust = reporter_trust(NEW.reporter_id);
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_report_trust ON public.reports;
+CREATE TRIGGER on_report_trust
+  BEFORE INSERT ON public.reports
+  FOR EACH ROW EXECUTE FUNCTION set_report_trust();
+
+CREATE OR REPLACE FUNCTION maintain_report_targets()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  was_active boolean := TG_OP <> 'INSERT' AND OLD.status IN ('open', 'investigating');
+  is_active  boolean := TG_OP <> 'DELETE' AND NEW.status IN ('open', 'investigating');
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO public.report_targets AS t
+        (target_type, target_id, active_count, total_count, trust_sum, first_reported_at, last_reported_at)
+      VALUES (NEW.reported_type, COALESCE(NEW.reported_item_id, NEW.reported_user_id),
+              is_active::int, 1, CASE WHEN is_active THEN NEW.reporter_trust ELSE 0 END, now(), now())
+      ON CONFLICT (target_type, target_id) DO UPDATE
+        SET active_count     = t.active_count + EXCLUDED.active_count,
+            total_count      = t.total_count + 1,
+            trust_sum        = t.trust_sum + EXCLUDED.trust_sum,
+            last_reported_at = now();
+    RETURN NULL;
+  END IF;
+
+  IF was_active IS DISTINCT FROM is_active THEN
+    UPDATE public.report_targets
+      SET active_count = GREATEST(active_count + CASE WHEN is_active THEN 1 ELSE -1 END, 0),
+          trust_sum    = GREATEST(trust_sum + CASE WHEN is_active THEN OLD.reporter_trust ELSE -OLD.reporter_trust END, 0)
+      WHERE target_type = OLD.reported_type
+        AND target_id = COALESCE(OLD.reported_item_id, OLD.reported_user_id);
+  END IF;
+  IF TG_OP = 'DELETE' THEN
+    UPDATE public.report_targets
+      SET total_count = GREATEST(total_count - 1, 0)
+      WHERE target_type = OLD.reported_type
+        AND target_id = COALESCE(OLD.reported_item_id, OLD.reported_user_id);
+  END IF;
+
+  -- A moderator's decision feeds back into the reporter's trust
+  IF TG_OP = 'UPDATE' AND was_active AND NEW.status IN ('resolved', 'dismissed') THEN
+    INSERT INTO public.reporter_stats AS s (reporter_id, upheld, dismissed)
+      VALUES (NEW.reporter_id, (NEW.status = 'resolved')::int, (NEW.status = 'dismissed')::int)
+      ON CONFLICT (reporter_id) DO UPDATE
+        SET upheld    = s.upheld + EXCLUDED.upheld,
+            dismissed = s.dismissed + EXCLUDED.dismissed;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_report_change ON public.reports;
+CREATE TRIGGER on_report_change
+  AFTER INSERT OR DELETE OR UPDATE OF status ON public.reports
+  FOR EACH ROW EXECUTE FUNCTION maintain_report_targets();
+
+-- 3. Priority-ordered queue: trust-weighted active reports, halved for
+--    every half_life_hours since the latest report
+CREATE OR REPLACE FUNCTION report_queue(page_size integer DEFAULT 20, page_offset integer DEFAULT 0,
+                                        half_life_hours numeric DEFAULT 48)
+RETURNS TABLE (
+  target_type text, target_id uuid, active_count integer, total_count integer,
+  trust_sum numeric, first_reported_at timestamp with time zone,
+  last_reported_at timestamp with time zone, priority numeric
+) LANGUAGE sql STABLE SECURITY DEFINER AS $$
+  SELECT t.target_type, t.target_id, t.active_count, t.total_count, t.trust_sum,
+         t.first_reported_at, t.last_reported_at,
+         round(t.trust_sum * power(0.5, extract(epoch FROM now() - t.last_reported_at) / 3600 / half_life_hours), 4)
+           AS priority
+    FROM public.report_targets t
+    WHERE t.active_count > 0
+    ORDER BY priority DESC, t.last_reported_at DESC
+    LIMIT page_size OFFSET page_offset;
+$$;
+
+-- 4. Resolve every active report on a target at once; returns how many
+CREATE OR REPLACE FUNCTION resolve_report_target(t_type text, t_id uuid, new_status text,
+                                                 actor_id uuid, action text DEFAULT NULL)
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  n integer;
+BEGIN
+  IF new_status NOT IN ('resolved', 'dismissed') THEN
+    RAISE EXCEPTION 'Invalid status %', new_status;
+  END IF;
+  UPDATE public.reports
+    SET status = new_status, action_taken = action, resolved_at = now(), resolved_by = actor_id
+    WHERE reported_type = t_type
+      AND COALESCE(reported_item_id, reported_user_id) = t_id
+      AND status IN ('open', 'investigating');
+  GET DIAGNOSTICS n = ROW_COUNT;
+  RETURN n;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION report_queue(integer, integer, numeric) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION resolve_report_target(text, uuid, text, uuid, text) FROM PUBLIC, anon, authenticated;
+
+-- 5. Backfill from existing reports
+INSERT INTO public.reporter_stats (reporter_id, upheld, dismissed)
+  SELECT reporter_id,
+         count(*) FILTER (WHERE status = 'resolved'),
+         count(*) FILTER (WHERE status = 'dismissed' AND action_taken IS DISTINCT FROM 'duplicate')
+    FROM public.reports GROUP BY reporter_id
+  ON CONFLICT (reporter_id) DO UPDATE SET upheld = EXCLUDED.upheld, dismissed = EXCLUDED.dismissed;
+
+INSERT INTO public.report_targets
+    (target_type, target_id, active_count, total_count, trust_sum, first_reported_at, last_reported_at)
+  SELECT reported_type, COALESCE(reported_item_id, reported_user_id),
+         count(*) FILTER (WHERE status IN ('open', 'investigating')),
+         count(*),
+         COALESCE(sum(reporter_trust) FILTER (WHERE status IN ('open', 'investigating')), 0),
+         min(created_at), max(created_at)
+    FROM public.reports
+    WHERE COALESCE(reported_item_id, reported_user_id) IS NOT NULL
+    GROUP BY reported_type, COALESCE(reported_item_id, reported_user_id)
+  ON CONFLICT (target_type, target_id) DO UPDATE
+    SET active_count = EXCLUDED.active_count, total_count = EXCLUDED.total_count,
+        trust_sum = EXCLUDED.trust_sum, first_reported_at = EXCLUDED.first_reported_at,
+        last_reported_at = EXCLUDED.last_reported_at;
+
+NOTIFY pgrst, 'reload schema';
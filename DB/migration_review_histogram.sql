@@ -0,0 +1,96 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Review rating histogram
+-- Run this in the Supabase SQL Editor (after migration_profile_stats.sql)
+-- ═══════════════════════════════════════════════════════════════
+
+-- 1. Per-profile 1–5 star histogram next to rating_sum / rating_count
+ALTER TABLE public.profiles
+  ADD COLUMN IF NOT EXISTS rating_histogram integer[] DEFAULT '{0,0,0,0,0}';
+
+UPDATE public.profiles SET rating_histogram = '{0,0,0,0,0}' WHERE rating_histogram IS NULL;
+
+-- 2. Review trigger now maintains the histogram too
+CREATE OR REPLACE FUNCTION maintain_profile_review_stats()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.profiles
+      SET rating_sum   = COALESCE(rating_sum, 0) + NEW.rating,
+          rating_count = COALESCE(rating_count, 0) + 1,
+          rating       = round((COALESCE(rating_sum, 0) + NEW.rating)::numeric / (COALESCE(rating_count, 0) + 1), 1),
+          rating_histogram[NEW.rating] = COALESCE(rating_histogram[NEW.rating], 0) + 1
+      WHERE id = NEW.reviewee_id;
+  ELSE
+    UPDATE public.profiles
+      SET rating_sum   = GREATEST(COALESCE(rating_sum, 0) - OLD.rating, 0),
+          rating_count = GREATEST(COALESCE(rating_count, 0) - 1, 0),
+          rating       = CASE WHEN COALESCE(rating_count, 0) - 1 > 0
+                              THEN round((rating_sum - OLD.rating)::numeric / (rating_count - 1), 1)
+                              ELSE 0 END,
+          rating_histogram[OLD.rating] = GREATEST(COALESCE(rating_histogram[OLD.rating], 0) - 1, 0)
+      WHERE id = OLD.reviewee_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- 3. Reconciliation covers the histogram as well
+CREATE OR REPLACE FUNCTION reconcile_profile_stats()
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  fixed integer;
+BEGIN
+  WITH actual AS (
+    SELECT
+      p.id,
+      COALESCE(i.listed, 0)  AS items_listed,
+      COALESCE(i.swapped, 0) AS items_swapped,
+      COALESCE(w.saved, 0)   AS wishlist_count,
+      COALESCE(r.total, 0)   AS rating_sum,
+      COALESCE(r.n, 0)       AS rating_count,
+      COALESCE(r.hist, '{0,0,0,0,0}') AS rating_histogram
+    FROM public.profiles p
+    LEFT JOIN (
+      SELECT owner_id, count(*) AS listed, count(*) FILTER (WHERE status = 'swapped') AS swapped
+      FROM public.items GROUP BY owner_id
+    ) i ON i.owner_id = p.id
+    LEFT JOIN (
+      SELECT user_id, count(*) AS saved FROM public.wishlists GROUP BY user_id
+    ) w ON w.user_id = p.id
+    LEFT JOIN (
+      SELECT reviewee_id, sum(rating) AS total, count(*) AS n,
+             ARRAY[
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+             ]::integer[] AS hist
+      FROM public.reviews GROUP BY reviewee_id
+    ) r ON r.reviewee_id = p.id
+  )
+  UPDATE public.profiles p
+    SET items_listed     = a.items_listed,
+        items_swapped    = a.items_swapped,
+        wishlist_count   = a.wishlist_count,
+        rating_sum       = a.rating_sum,
+        rating_count     = a.rating_count,
+        rating_histogram = a.rating_histogram,
+        rating           = CASE WHEN a.rating_count > 0 THEN round(a.rating_sum::numeric / a.rating_count, 1) ELSE 0 END
+    FROM actual a
+    WHERE p.id = a.id
+      AND (p.items_listed, p.items_swapped, p.wishlist_count, p.rating_sum, p.rating_count, p.rating_histogram)
+          IS DISTINCT FROM (a.items_listed, a.items_swapped, a.wishlist_count, a.rating_sum, a.rating_count, a.rating_histogram);
+
+  GET DIAGNOSTICS fixed = ROW_COUNT;
+  RETURN fixed;
+END;
+$$;
+
+-- 4. Backfill histograms for existing reviews
+SELECT reconcile_profile_stats();
+
+-- 5. Keyset pagination index for review lists
+CREATE INDEX IF NOT EXISTS idx_reviews_reviewee_created ON public.reviews(reviewee_id, created_at DESC, id DESC);
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,66 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Atomic swap completion
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- Applies every side effect of a completed swap in one transaction:
+--   1. marks the conversation item and all proposed items as swapped
+--   2. grants 200 eco_points to both participants
+--   3. stores the completed state on the conversation
+--   4. inserts the system message
+-- The conversation row is locked first, so two concurrent "complete"
+-- calls cannot both apply the side effects.
+CREATE OR REPLACE FUNCTION complete_swap(conv_id uuid, actor_id uuid, system_msg text)
+RETURNS jsonb LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+  conv public.conversations%ROWTYPE;
+BEGIN
+  SELECT * INTO conv FROM public.conversations WHERE id = conv_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Conversation % not found', conv_id;
+  END IF;
+
+  -- Already completed by a concurrent request — nothing left to apply
+  IF conv.status = 'completed' THEN
+    RETURN to_jsonb(conv);
+  END IF;
+
+  UPDATE public.items
+    SET status = 'swapped'
+    WHERE id IN (
+      SELECT conv.item_id WHERE conv.item_id IS NOT NULL
+      UNION
+      -- metadata is client-supplied: skip ids that aren't uuids instead of
+      -- failing the cast (one bad proposal must not block completion)
+      SELECT (m.metadata->>'item_id')::uuid
+        FROM public.messages m
+        WHERE m.conversation_id = conv_id
+          AND m.type = 'item_proposal'
+          AND m.metadata->>'item_id' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+    );
+
+  UPDATE public.profiles
+    SET eco_points = COALESCE(eco_points, 0) + 200
+    WHERE id IN (conv.user1_id, conv.user2_id);
+
+  UPDATE public.conversations
+    SET status = 'completed',
+        completed_by = CASE
+          WHEN actor_id = ANY(COALESCE(completed_by, '{}')) THEN completed_by
+          ELSE array_append(COALESCE(completed_by, '{}'), actor_id)
+        END,
+        completed_at = now()
+    WHERE id = conv_id
+    RETURNING * INTO conv;
+
+  INSERT INTO public.messages (conversation_id, sender_id, content, type)
+    VALUES (conv_id, actor_id, system_msg, 'system');
+
+  RETURN to_jsonb(conv);
+END;
+$$;
+
+-- Called by the backend with the service role only
+REVOKE EXECUTE ON FUNCTION complete_swap(uuid, uuid, text) FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,29 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Background AI verification jobs
+-- Run this in the Supabase SQL Editor
+-- ═══════════════════════════════════════════════════════════════
+
+-- Job rows are shared by every API worker: any worker can report a job's
+-- status, and claiming (queued → running) is a conditional update so each
+-- job runs exactly once.
+CREATE TABLE IF NOT EXISTS public.verification_jobs (
+  id          uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  owner_id    uuid NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+  item_id     uuid REFERENCES public.items(id) ON DELETE CASCADE,
+  request     jsonb NOT NULL,                 -- { brand, category, image_urls, threshold }
+  status      text NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+  result      jsonb,                          -- { ai_score, verified, status, reason }
+  error       text,
+  created_at  timestamp with time zone DEFAULT now() NOT NULL,
+  started_at  timestamp with time zone,
+  finished_at timestamp with time zone
+);
+
+ALTER TABLE public.verification_jobs ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Owners can view their verification jobs" ON public.verification_jobs;
+CREATE POLICY "Owners can view their verification jobs" ON public.verification_jobs FOR SELECT
+  USING (auth.uid() = owner_id);
+
+CREATE INDEX IF NOT EXISTS idx_verification_jobs_status ON public.verification_jobs(status, created_at);
+
+NOTIFY pgrst, 'reload schema';
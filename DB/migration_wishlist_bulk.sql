@@ -0,0 +1,66 @@
+-- ═══════════════════════════════════════════════════════════════
+-- SwapStyl — Bulk wishlist writes
+-- Run this in the Supabase SQL Editor (after migration_profile_stats.sql)
+-- ═══════════════════════════════════════════════════════════════
+
+-- 1. wishlist_count is adjusted once per statement by the number of rows the
+--    statement actually inserted/deleted (transition tables), replacing the
+--    per-row trigger from migration_profile_stats.sql
+DROP TRIGGER IF EXISTS on_wishlist_stats_change ON public.wishlists;
+
+CREATE OR REPLACE FUNCTION maintain_profile_wishlist_stats_insert()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  UPDATE public.profiles p
+    SET wishlist_count = COALESCE(p.wishlist_count, 0) + d.n
+    FROM (SELECT user_id, count(*) AS n FROM inserted_rows GROUP BY user_id) d
+    WHERE p.id = d.user_id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION maintain_profile_wishlist_stats_delete()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  UPDATE public.profiles p
+    SET wishlist_count = GREATEST(COALESCE(p.wishlist_count, 0) - d.n, 0)
+    FROM (SELECT user_id, count(*) AS n FROM deleted_rows GROUP BY user_id) d
+    WHERE p.id = d.user_id;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_wishlist_stats_insert ON public.wishlists;
+CREATE TRIGGER on_wishlist_stats_insert
+  AFTER INSERT ON public.wishlists
+  REFERENCING NEW TABLE AS inserted_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION maintain_profile_wishlist_stats_insert();
+
+DROP TRIGGER IF EXISTS on_wishlist_stats_delete ON public.wishlists;
+CREATE TRIGGER on_wishlist_stats_delete
+  AFTER DELETE ON public.wishlists
+  REFERENCING OLD TABLE AS deleted_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION maintain_profile_wishlist_stats_delete();
+
+-- 2. Set-semantics add/remove in a single statement. Each returns only the
+--    item ids that actually changed (already-saved / not-saved ids are skipped).
+CREATE OR REPLACE FUNCTION wishlist_add_items(uid uuid, item_ids uuid[])
+RETURNS SETOF uuid LANGUAGE sql SECURITY DEFINER AS $$
+  INSERT INTO public.wishlists (user_id, item_id)
+    SELECT uid, i FROM unnest(item_ids) AS i
+    ON CONFLICT (user_id, item_id) DO NOTHING
+    RETURNING item_id;
+$$;
+
+CREATE OR REPLACE FUNCTION wishlist_remove_items(uid uuid, item_ids uuid[])
+RETURNS SETOF uuid LANGUAGE sql SECURITY DEFINER AS $$
+  DELETE FROM public.wishlists
+    WHERE user_id = uid AND item_id = ANY(item_ids)
+    RETURNING item_id;
+$$;
+
+-- They act on a caller-supplied uid, so only the service-role backend may call them
+REVOKE EXECUTE ON FUNCTION wishlist_add_items(uuid, uuid[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION wishlist_remove_items(uuid, uuid[]) FROM PUBLIC, anon, authenticated;
+
+NOTIFY pgrst, 'reload schema';
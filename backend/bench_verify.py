@@ -0,0 +1,255 @@
+"""
+Offline benchmark for the upload → AI verification path.
+
+Drives verify_jobs end to end — submit() as create_item calls it, the job
+workers claiming and running jobs, the real verifier (download,
+preprocessing, cache, limiter, time budget) — against the deterministic stub
+backend, an in-memory job store and images served by a mock transport, so
+throughput and queueing can be measured and profiled without network
+access, a database or paid calls:
+
+    python bench_verify.py --items 500 --rate 50 --workers 8 --latency-ms 800
+    python -m cProfile -s cumtime bench_verify.py --items 200
+    python bench_verify.py --backend replay --replay-path recorded.jsonl
+
+Jobs arrive at a fixed rate (like verify_in_background uploads). Reports
+throughput, end-to-end latency percentiles from submit() to the job row
+being finished (queue wait included, and reported separately), and the
+peak limiter queue.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+
+from services import job_runner, verification_cache, verifier, verify_backends, verify_jobs
+
+try:
+    from PIL import Image
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+
+def synthetic_image(rng: random.Random, size: int) -> bytes:
+    """A distinct photo-sized JPEG (random bytes when Pillow is missing)."""
+    if not _PIL_AVAILABLE:
+        return bytes(rng.getrandbits(8) for _ in range(size * 64))
+    # Random 8x8 blocks upscaled, so every image also has a distinct perceptual hash
+    blocks = Image.new("RGB", (8, 8))
+    blocks.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(64)])
+    img = blocks.resize((size, size), Image.NEAREST)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class MemoryJobStore:
+    """Just enough of the Supabase client for verify_jobs: an in-memory verification_jobs table.
+
+    Also records when each job was claimed and finished. Other tables are empty.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.claimed = {}    # job id -> monotonic time
+        self.finished = {}
+        self.lock = threading.Lock()
+
+    def table(self, name: str) -> "_MemoryQuery":
+        return _MemoryQuery(self, name)
+
+
+class _MemoryQuery:
+    def __init__(self, store: MemoryJobStore, name: str):
+        self.store = store
+        self.name = name
+        self.op = "select"
+        self.values = None
+        self.eqs = {}
+        self.claimable_only = False
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def insert(self, row: dict):
+        self.op, self.values = "insert", row
+        return self
+
+    def update(self, values: dict):
+        self.op, self.values = "update", values
+        return self
+
+    def eq(self, column: str, value):
+        self.eqs[column] = value
+        return self
+
+    def or_(self, filters: str):
+        # verify_jobs only uses or_() on jobs for the runner's claimable filter
+        self.claimable_only = True
+        return self
+
+    def __getattr__(self, name):
+        # order(), limit(), in_() … don't matter for a single table of jobs
+        return lambda *args, **kwargs: self
+
+    @staticmethod
+    def _claimable(row: dict) -> bool:
+        retry_at = row.get("retry_at")
+        return row["status"] == "queued" and (
+            retry_at is None or datetime.fromisoformat(retry_at) <= datetime.now(timezone.utc)
+        )
+
+    def execute(self):
+        if self.name != "verification_jobs":
+            return SimpleNamespace(data=[])
+        store = self.store
+        with store.lock:
+            if self.op == "insert":
+                row = {
+                    "id": str(uuid.uuid4()), "status": "queued", "attempts": 0, "retry_at": None,
+                    "created_at": datetime.now(timezone.utc).isoformat(), **self.values,
+                }
+                store.rows[row["id"]] = row
+                return SimpleNamespace(data=[dict(row)])
+
+            rows = [r for r in store.rows.values() if all(r.get(k) == v for k, v in self.eqs.items())]
+            if self.claimable_only:
+                rows = [r for r in rows if self._claimable(r)]
+            if self.op == "update":
+                now = time.monotonic()
+                for row in rows:
+                    row.update(self.values)
+                    if row["status"] == "running":
+                        store.claimed[row["id"]] = now
+                    elif row["status"] in ("done", "failed"):
+                        store.finished[row["id"]] = now
+            return SimpleNamespace(data=[dict(r) for r in rows])
+
+
+def image_transport(images) -> httpx.MockTransport:
+    """Serves images[i] at https://bench.invalid/<i>.jpg."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        index = int(request.url.path.strip("/").split(".")[0])
+        return httpx.Response(200, content=images[index], headers={"content-type": "image/jpeg"})
+    return httpx.MockTransport(handler)
+
+
+def latency_line(label: str, values) -> str:
+    return (
+        f"{label} p50={percentile(values, 0.5):.3f}s p95={percentile(values, 0.95):.3f}s "
+        f"p99={percentile(values, 0.99):.3f}s mean={statistics.mean(values):.3f}s"
+    )
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    images = [synthetic_image(rng, args.image_size) for _ in range(args.unique_images or args.items)]
+    brands = ["Nike", "Adidas", "Zara", "Levi's"]
+
+    store = MemoryJobStore()
+    job_runner.get_supabase = verify_jobs.get_supabase = lambda: store
+    verifier._http_client = httpx.AsyncClient(transport=image_transport(images))
+    await verify_jobs.start(args.workers)
+
+    submitted = {}
+    peak_waiting = 0
+
+    async def sample_queue() -> None:
+        nonlocal peak_waiting
+        while True:
+            peak_waiting = max(peak_waiting, verifier.stats()["waiting"])
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_queue())
+    started = time.monotonic()
+    for i in range(args.items):
+        at = time.monotonic()
+        # create_item submits from the route's threadpool
+        job = await asyncio.to_thread(
+            verify_jobs.submit, "bench-owner", brands[i % len(brands)], "Shoes",
+            [f"https://bench.invalid/{i % len(images)}.jpg"],
+        )
+        submitted[job["id"]] = at
+        if args.rate:
+            await asyncio.sleep(1 / args.rate)
+    while len(store.finished) < args.items:
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - started
+    sampler.cancel()
+    job_stats = verify_jobs.stats()
+    await verify_jobs.stop()
+    await verifier.close()
+
+    end_to_end = [store.finished[job_id] - at for job_id, at in submitted.items()]
+    queue_wait = [store.claimed[job_id] - at for job_id, at in submitted.items()]
+    failed = sum(row["status"] == "failed" for row in store.rows.values())
+    cached = sum(bool((row.get("result") or {}).get("cached")) for row in store.rows.values())
+
+    backend = verify_backends.get_backend()
+    print(
+        f"backend={backend.name} items={args.items} workers={args.workers} "
+        f"concurrency={verifier.MAX_CONCURRENCY} rate={args.rate or 'burst'}/s"
+    )
+    print(f"elapsed={elapsed:.2f}s throughput={args.items / elapsed:.1f} jobs/s")
+    print(latency_line("end-to-end", end_to_end))
+    print(latency_line("queue wait", queue_wait))
+    print(
+        f"failed={failed} retried={job_stats['retried']} cached={cached} "
+        f"peak_waiting={peak_waiting} cache={verification_cache.stats()}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(verify_backends.BACKENDS), default="stub")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--unique-images", type=int, default=0, help="reuse this many images (0 = all distinct)")
+    parser.add_argument("--rate", type=float, default=0, help="arrivals per second (0 = all at once)")
+    parser.add_argument("--workers", type=int, default=verify_jobs.WORKERS, help="job workers")
+    parser.add_argument("--concurrency", type=int, default=verifier.MAX_CONCURRENCY, help="verifier limiter size")
+    parser.add_argument("--latency-ms", type=float, default=None)
+    parser.add_argument("--latency-jitter-ms", type=float, default=None)
+    parser.add_argument("--score-mean", type=float, default=None)
+    parser.add_argument("--score-stddev", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=None)
+    parser.add_argument("--replay-path", default=os.environ.get("VERIFY_REPLAY_PATH"))
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.backend == "stub":
+        verify_backends.set_backend(verify_backends.StubBackend(
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.latency_jitter_ms,
+            score_mean=args.score_mean,
+            score_stddev=args.score_stddev,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ))
+    elif args.backend == "replay":
+        verify_backends.set_backend(verify_backends.ReplayBackend(args.replay_path))
+
+    # The limiter is created at import; resize it for this run
+    verifier.MAX_CONCURRENCY = args.concurrency
+    verifier._limiter = asyncio.Semaphore(args.concurrency)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import os
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 from fastapi import Header, HTTPException, Depends
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Kept at import: service modules read their env settings at import time.
+# The supabase SDK itself (~0.2s) is only imported when a client is built.
 load_dotenv()
 
 url: str = os.environ.get("SUPABASE_URL")
@@ -15,9 +20,15 @@ service_key: str = _raw_service_key if (_raw_service_key and not _raw_service_ke
 # Service-role client — bypasses RLS entirely.
 # The backend validates users via JWT in Python (get_current_user),
 # so RLS is not needed at the DB level.
-_service_client: Client = None
+_service_client: "Client" = None
+
+
+def create_client(supabase_url: str, supabase_key: str) -> "Client":
+    from supabase import create_client as _create_client
+    return _create_client(supabase_url, supabase_key)
+
 
-def _get_service_client() -> Client:
+def _get_service_client() -> "Client":
     global _service_client
     if _service_client is None:
         if not url or not service_key:
@@ -32,12 +43,12 @@ async def get_token(authorization: str = Header(...)):
     return authorization.split(" ")[1]
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Service-role client — bypasses RLS."""
     return _get_service_client()
 
 
-def get_authenticated_client(token: str = Depends(get_token)) -> Client:
+def get_authenticated_client(token: str = Depends(get_token)) -> "Client":
     import httpx
     # Create a fresh client instance per request
     client = create_client(url, anon_key)
@@ -1,8 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import items, swipes, profiles, wishlists, verify, conversations, reviews, auth, admin
+from services import admin_stats, audit_log, cleanup_jobs, profile_stats, phash_index, verifier, verify_jobs
 
-app = FastAPI(title="SwapStyl API", version="0.1.0")
+# Keep references so background tasks aren't garbage-collected mid-flight
+_background_tasks = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Clients (Supabase, OpenAI, HTTP pools) are built here or on first use, never at import."""
+    jobs = (
+        profile_stats.reconcile_forever(),
+        admin_stats.refresh_forever(),
+        # Warm the duplicate-photo index without delaying startup
+        asyncio.to_thread(phash_index.warm),
+    )
+    for job in jobs:
+        task = asyncio.create_task(job)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    await verify_jobs.start()
+    await cleanup_jobs.start()
+    await audit_log.start()
+    yield
+    await verify_jobs.stop()
+    await cleanup_jobs.stop()
+    # Last: everything above may still record audit entries
+    await audit_log.stop()
+    await verifier.close()
+
+
+app = FastAPI(title="SwapStyl API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
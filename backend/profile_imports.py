@@ -0,0 +1,98 @@
+"""
+Import-time profile of the API, i.e. the worker cold-start cost.
+
+Imports `main` in a fresh interpreter under `python -X importtime` and
+reports the slowest modules, by cumulative and by self time:
+
+    python profile_imports.py
+    python profile_imports.py --top 40 --module routers.items
+    python profile_imports.py --budget-ms 1200 --forbid openai,supabase
+
+With --budget-ms / --forbid it exits non-zero when importing the module
+takes longer than the budget, or pulls in an SDK that should only load on
+first use (clients are built lazily or in main's lifespan hook), so it can
+gate CI. Timings are the median of --runs fresh interpreters.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_once(module: str) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """{module: (self µs, cumulative µs)} for one fresh import, plus the target's cumulative µs."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, timings.get(module, (0, 0))[1]
+
+
+def profile(module: str, runs: int) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Per-module median over `runs` fresh interpreters (the first run also warms the disk cache)."""
+    samples: List[Dict[str, Tuple[int, int]]] = []
+    totals: List[int] = []
+    for _ in range(runs):
+        timings, total = profile_once(module)
+        samples.append(timings)
+        totals.append(total)
+    merged = {
+        name: (
+            int(statistics.median(s[name][0] for s in samples if name in s)),
+            int(statistics.median(s[name][1] for s in samples if name in s)),
+        )
+        for name in samples[-1]
+    }
+    return merged, int(statistics.median(totals))
+
+
+def report(timings: Dict[str, Tuple[int, int]], total_us: int, module: str, top: int) -> None:
+    print(f"import {module}: {total_us / 1000:.1f} ms, {len(timings)} modules\n")
+    for title, index in (("cumulative", 1), ("self", 0)):
+        print(f"Slowest by {title} time:")
+        ranked = sorted(timings.items(), key=lambda kv: kv[1][index], reverse=True)[:top]
+        for name, (self_us, cumulative_us) in ranked:
+            print(f"  {cumulative_us / 1000:9.1f} ms cum  {self_us / 1000:8.1f} ms self  {name}")
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail if importing --module takes longer (0 = no limit)")
+    parser.add_argument("--forbid", default="", help="comma-separated top-level packages that must not be imported")
+    args = parser.parse_args()
+
+    timings, total_us = profile(args.module, max(args.runs, 1))
+    report(timings, total_us, args.module, args.top)
+
+    failures = []
+    if args.budget_ms and total_us / 1000 > args.budget_ms:
+        failures.append(f"import {args.module} took {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for package in filter(None, (p.strip() for p in args.forbid.split(","))):
+        if package in timings:
+            failures.append(f"{package} is imported eagerly ({timings[package][1] / 1000:.1f} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from typing import Callable, Iterator, Optional, List
+from datetime import datetime, timezone
+import csv
+import io
+import json
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import admin_stats, audit_log, cleanup_jobs, params, profile_cache, rate_limit, verification_cache, verifier, verify_jobs, phash_index
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+MAX_BULK_MODERATE = 500
+EXPORT_BATCH_SIZE = 1000
+
 
 class ModerateItemPayload(BaseModel):
     action: str  # "approve" | "reject"
     reason: Optional[str] = None
 
 
+class BulkModeratePayload(BaseModel):
+    item_ids: List[str]
+    action: str  # "approve" | "reject"
+    reason: Optional[str] = None
+
+
 class ReportPayload(BaseModel):
     reported_type: str  # "item" | "user"
     reported_item_id: Optional[str] = None
@@ -40,6 +54,76 @@ def check_admin(current_user=Depends(get_current_user), supabase=Depends(get_sup
     return current_user
 
 
+# ── Paging for admin lists ──
+# Pages are ordered newest first by (created_at, id). A `cursor` (next_cursor
+# from the previous page) pages by keyset; `page` keeps offset paging for
+# existing clients. Either way the total rides along on the page query, so a
+# page load is one round trip:
+#   exact     — exact count (default)
+#   planned   — Postgres planner estimate, for very large tables
+#   estimated — exact below PostgREST's threshold, planned above it
+#   snapshot  — counter from the dashboard snapshot (only where one matches the filter)
+#   none      — no total
+COUNT_MODES = ("exact", "planned", "estimated", "snapshot", "none")
+
+
+def _list_page(
+    supabase,
+    table: str,
+    columns: str,
+    filters: Callable,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    count: str,
+    snapshot_field: Optional[str] = None,
+) -> dict:
+    """Fetch one page (plus one row to detect more) with its total in a single query."""
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count must be one of {', '.join(COUNT_MODES)}")
+    if count == "snapshot" and snapshot_field is None:
+        count = "exact"
+
+    query = filters(supabase.table(table).select(columns, count=count if count in ("exact", "planned", "estimated") else None))
+    if cursor:
+        query = query.or_(params.keyset_before(cursor))
+        offset = 0
+    else:
+        offset = (page - 1) * page_size
+
+    resp = (
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
+        .range(offset, offset + page_size)
+        .execute()
+    )
+    rows = resp.data or []
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if count == "snapshot":
+        total = admin_stats.snapshot()[snapshot_field]
+    elif count == "none":
+        total = None
+    else:
+        total = resp.count
+
+    return {
+        "rows": rows,
+        "page": None if cursor else page,
+        "page_size": page_size,
+        "total": total,
+        "count_mode": count,
+        "has_more": has_more,
+        "next_cursor": params.encode_cursor(rows[-1]) if has_more else None,
+    }
+
+
+def _page_response(key: str, page: dict) -> dict:
+    rows = page.pop("rows")
+    return {key: rows, **page}
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # ADMIN USER MANAGEMENT
 # ──────────────────────────────────────────────────────────────────────────────
@@ -78,13 +162,7 @@ def set_user_role(
         }).eq("id", user_id).execute()
         
         # Log this action
-        supabase.table("moderation_log").insert({
-            "moderator_id": current_user.id,
-            "action_type": "user_role_changed",
-            "target": f"user:{user_id}",
-            "reason": f"Role set to: {role}",
-            "timestamp": datetime.utcnow().isoformat()
-        }).execute()
+        audit_log.record(current_user.id, "user_role_changed", "user", user_id, f"Role set to: {role}")
         
         return {"success": True, "message": f"User role set to {role}"}
     
@@ -96,49 +174,27 @@ def set_user_role(
 
 
 
-@router.get("/dashboard")
-def get_dashboard(
-    current_user=Depends(check_admin),
-    supabase=Depends(get_supabase),
-):
-    """Get admin dashboard stats."""
-    # Pending reviews
-    pending = supabase.table("items").select("id", count="exact").eq("moderation_status", "pending_review").execute()
-    pending_count = pending.count or 0
-
-    # Open reports
-    reports = supabase.table("reports").select("id", count="exact").eq("status", "open").execute()
-    reports_count = reports.count or 0
-
-    # Suspended users (count where suspended_at IS NOT NULL)
-    try:
-        # Use is notation for NULL checks in PostgREST
-        suspended = supabase.table("profiles").select("id", count="exact").filter("suspended_at", "is", "not null").execute()
-        suspended_count = suspended.count or 0
-    except:
-        suspended_count = 0
-
-    # Total items (count where deleted_at IS NULL)
-    try:
-        # Count active items (not deleted)
-        items = supabase.table("items").select("id", count="exact").filter("deleted_at", "is", "null").execute()
-        total_items = items.count or 0
-    except:
-        total_items = 0
-
-    # Total users
-    users = supabase.table("profiles").select("id", count="exact").execute()
-    total_users = users.count or 0
-
+@router.get("/cache-stats")
+def get_cache_stats(current_user=Depends(check_admin)):
+    """Hit/miss metrics for the process-local caches of this worker."""
     return {
-        "pending_reviews": pending_count,
-        "open_reports": reports_count,
-        "suspended_users": suspended_count,
-        "total_items": total_items,
-        "total_users": total_users,
+        "profiles": profile_cache.stats(),
+        "verification": verification_cache.stats(),
+        "verifier": verifier.stats(),
+        "verify_jobs": verify_jobs.stats(),
+        "cleanup_jobs": cleanup_jobs.stats(),
+        "audit_log": audit_log.stats(),
+        "image_hashes": phash_index.stats(),
+        "rate_limit": rate_limit.stats(),
     }
 
 
+@router.get("/dashboard")
+def get_dashboard(current_user=Depends(check_admin)):
+    """Get admin dashboard stats from the background-refreshed snapshot (see services/admin_stats.py)."""
+    return admin_stats.snapshot()
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # PRODUCT MODERATION
 # ──────────────────────────────────────────────────────────────────────────────
@@ -147,31 +203,105 @@ def get_dashboard(
 def get_pending_items(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", description="exact | planned | estimated | snapshot | none"),
     current_user=Depends(check_admin),
     supabase=Depends(get_supabase),
 ):
     """Get items pending manual review (ai_score < 75%)."""
-    offset = (page - 1) * page_size
-    resp = (
-        supabase.table("items")
-        .select("*, owner:owner_id(id, full_name, username, avatar_url)")
-        .eq("moderation_status", "pending_review")
-        .order("created_at", desc=True)
-        .range(offset, offset + page_size - 1)
-        .execute()
+    result = _list_page(
+        supabase, "items", "*, owner:owner_id(id, full_name, username, avatar_url)",
+        lambda q: q.eq("moderation_status", "pending_review"),
+        page, page_size, cursor, count, snapshot_field="pending_reviews",
     )
-    items = resp.data or []
-    
-    # Get total count
-    count_resp = supabase.table("items").select("id", count="exact").eq("moderation_status", "pending_review").execute()
-    total = count_resp.count or 0
+
+    # Flag listings whose photos also appear on other items (relists, stolen photos)
+    phash_index.sync(supabase)
+    for item in result["rows"]:
+        item["duplicates"] = [
+            {**d, "same_owner": d["owner_id"] == item["owner_id"]}
+            for d in phash_index.duplicates_for_item(item["id"])
+        ]
+
+    return _page_response("items", result)
+
+
+@router.post("/items/moderate-bulk")
+def moderate_items_bulk(
+    payload: BulkModeratePayload,
+    current_user=Depends(check_admin),
+    supabase=Depends(get_authenticated_client),
+):
+    """Approve or reject many pending items: one set-based update, one multi-row log insert."""
+    if payload.action not in ("approve", "reject"):
+        raise HTTPException(status_code=400, detail="Invalid action")
+    requested = list(dict.fromkeys(payload.item_ids))
+    if not requested:
+        raise HTTPException(status_code=400, detail="item_ids must not be empty")
+    if len(requested) > MAX_BULK_MODERATE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_MODERATE} items per request")
+    # Ids go into in_() filters: anything that isn't a uuid is reported, never sent
+    invalid = [item_id for item_id in requested if not params.is_uuid(item_id)]
+    item_ids = list(dict.fromkeys(params.parse_uuid(item_id) for item_id in requested if params.is_uuid(item_id)))
+
+    new_status = "approved" if payload.action == "approve" else "rejected"
+    update_data = {
+        "moderation_status": new_status,
+        "reviewed_by": current_user.id,
+        "reviewed_at": "now()",
+    }
+    if payload.reason:
+        update_data["moderation_reason"] = payload.reason
+
+    # The pending filter makes this safe against concurrent moderators:
+    # an item already handled elsewhere simply isn't in the returned rows
+    moderated = set()
+    if item_ids:
+        resp = (
+            supabase.table("items")
+            .update(update_data)
+            .in_("id", item_ids)
+            .eq("moderation_status", "pending_review")
+            .execute()
+        )
+        moderated = {row["id"] for row in resp.data or []}
+    admin_stats.adjust(pending_reviews=-len(moderated))
+
+    if moderated:
+        audit_log.record_many([
+            {
+                "moderator_id": current_user.id,
+                "action_type": payload.action,
+                "target_type": "item",
+                "target_id": item_id,
+                "reason": payload.reason,
+            }
+            for item_id in item_ids if item_id in moderated
+        ])
+
+    # Only the leftovers need a second look, to say why they were skipped
+    skipped = [item_id for item_id in item_ids if item_id not in moderated]
+    current = {}
+    if skipped:
+        rows = supabase.table("items").select("id, moderation_status").in_("id", skipped).execute().data or []
+        current = {row["id"]: row["moderation_status"] for row in rows}
+
+    results = []
+    for item_id in item_ids:
+        if item_id in moderated:
+            results.append({"item_id": item_id, "outcome": "moderated", "status": new_status})
+        elif item_id in current:
+            results.append({"item_id": item_id, "outcome": "not_pending", "status": current[item_id]})
+        else:
+            results.append({"item_id": item_id, "outcome": "not_found"})
+    results.extend({"item_id": item_id, "outcome": "invalid"} for item_id in invalid)
 
     return {
-        "items": items,
-        "page": page,
-        "page_size": page_size,
-        "total": total,
-        "has_more": offset + page_size < total,
+        "success": True,
+        "status": new_status,
+        "moderated": len(moderated),
+        "skipped": len(skipped) + len(invalid),
+        "results": results,
     }
 
 
@@ -206,15 +336,10 @@ def moderate_item(
         update_data["moderation_reason"] = payload.reason
 
     supabase.table("items").update(update_data).eq("id", item_id).execute()
+    admin_stats.adjust(pending_reviews=-1)
 
     # Log action
-    supabase.table("moderation_log").insert({
-        "moderator_id": current_user.id,
-        "action_type": payload.action,
-        "target_type": "item",
-        "target_id": item_id,
-        "reason": payload.reason,
-    }).execute()
+    audit_log.record(current_user.id, payload.action, "item", item_id, payload.reason)
 
     return {"success": True, "status": new_status}
 
@@ -230,37 +355,41 @@ def delete_item_admin(
     current_user=Depends(check_admin),
     supabase=Depends(get_authenticated_client),
 ):
-    """Delete an item with cascading deletions."""
+    """Hide an item now; its wishlists / swipes rows are cleaned up in the background."""
     # Get item
     item_resp = supabase.table("items").select("*").eq("id", item_id).single().execute()
     if not item_resp.data:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    # Soft delete: mark deleted_at instead of removing
-    supabase.table("items").update({
-        "deleted_at": "now()",
-        "status": "deleted",
-    }).eq("id", item_id).execute()
-
-    # Cascade: Delete from wishlists
-    supabase.table("wishlists").delete().eq("item_id", item_id).execute()
+    # Soft delete and the cleanup job for its wishlists / swipes rows are
+    # recorded together (services/cleanup_jobs.py) — the item is hidden now
+    job = cleanup_jobs.delete_item(item_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not item_resp.data.get("deleted_at"):
+        admin_stats.adjust(
+            total_items=-1,
+            pending_reviews=-(item_resp.data.get("moderation_status") == "pending_review"),
+        )
 
-    # Cascade: Delete from swipes
-    supabase.table("swipes").delete().eq("item_id", item_id).execute()
+    phash_index.forget_item(item_id)
 
     # Cascade: Mark reviews as referencing deleted item (don't delete, keeps history)
     # Reviews stay but item_id is now orphaned - UI can handle "item deleted"
 
     # Log action
-    supabase.table("moderation_log").insert({
-        "moderator_id": current_user.id,
-        "action_type": "delete",
-        "target_type": "item",
-        "target_id": item_id,
-        "reason": reason or "Admin deletion",
-    }).execute()
+    audit_log.record(current_user.id, "delete", "item", item_id, reason or "Admin deletion")
+
+    return {"success": True, "item_id": item_id, "status": "deleted", "cleanup_job_id": job["id"]}
 
-    return {"success": True, "item_id": item_id, "status": "deleted"}
+
+@router.get("/cleanup-jobs/{job_id}")
+def get_cleanup_job(job_id: str, current_user=Depends(check_admin)):
+    """Progress of an item deletion cascade."""
+    job = cleanup_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -277,17 +406,24 @@ def create_report(
     if not payload.reason or len(payload.reason.strip()) < 5:
         raise HTTPException(status_code=400, detail="Reason must be at least 5 characters")
 
-    resp = supabase.table("reports").insert({
-        "reporter_id": current_user.id,
-        "reported_type": payload.reported_type,
-        "reported_item_id": payload.reported_item_id,
-        "reported_user_id": payload.reported_user_id,
-        "reason": payload.reason,
-        "description": payload.description,
-    }).execute()
+    try:
+        resp = supabase.table("reports").insert({
+            "reporter_id": current_user.id,
+            "reported_type": payload.reported_type,
+            "reported_item_id": payload.reported_item_id,
+            "reported_user_id": payload.reported_user_id,
+            "reason": payload.reason,
+            "description": payload.description,
+        }).execute()
+    except Exception as e:
+        # idx_reports_one_active_per_reporter: one open report per reporter and target
+        if "idx_reports_one_active_per_reporter" in str(e) or "23505" in str(e):
+            raise HTTPException(status_code=409, detail="You have already reported this")
+        raise
 
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to create report")
+    admin_stats.adjust(open_reports=1)
 
     return {"report_id": resp.data[0]["id"], "status": "submitted"}
 
@@ -295,39 +431,108 @@ def create_report(
 @router.get("/reports")
 def get_reports(
     status: Optional[str] = Query(None),
+    target_id: Optional[str] = Query(None, description="only reports about this item or user"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", description="exact | planned | estimated | snapshot | none"),
     current_user=Depends(check_admin),
     supabase=Depends(get_supabase),
 ):
     """Get reports (admins only)."""
-    offset = (page - 1) * page_size
-    
-    query = supabase.table("reports").select(
+    result = _list_page(
+        supabase, "reports",
         "*, reporter:reporter_id(id, full_name, avatar_url), "
         "item:reported_item_id(id, title, images, owner_id), "
-        "user:reported_user_id(id, full_name, avatar_url)"
+        "user:reported_user_id(id, full_name, avatar_url)",
+        lambda q: _report_filters(q, status, target_id),
+        page, page_size, cursor, count,
+        snapshot_field="open_reports" if status == "open" and not target_id else None,
     )
-    
+    return _page_response("reports", result)
+
+
+def _report_filters(query, status: Optional[str], target_id: Optional[str]):
     if status:
         query = query.eq("status", status)
-    
-    resp = query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
-    reports = resp.data or []
+    if target_id:
+        # Interpolated into an or_() filter string, so it must be exactly a uuid
+        target_id = params.parse_uuid(target_id, "target_id")
+        query = query.or_(f"reported_item_id.eq.{target_id},reported_user_id.eq.{target_id}")
+    return query
 
-    # Get total
-    count_query = supabase.table("reports").select("id", count="exact")
-    if status:
-        count_query = count_query.eq("status", status)
-    count = count_query.execute().count or 0
 
-    return {
-        "reports": reports,
-        "page": page,
-        "page_size": page_size,
-        "total": count,
-        "has_more": offset + page_size < count,
-    }
+@router.get("/reports/queue")
+def get_report_queue(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, le=100),
+    half_life_hours: float = Query(48, gt=0, description="priority halves for every this many hours since the latest report"),
+    current_user=Depends(check_admin),
+    supabase=Depends(get_supabase),
+):
+    """One entry per reported item/user, highest priority first (see DB/migration_report_queue.sql)."""
+    offset = (page - 1) * page_size
+    resp = supabase.rpc("report_queue", {
+        "page_size": page_size + 1,
+        "page_offset": offset,
+        "half_life_hours": half_life_hours,
+    }).execute()
+    entries = resp.data or []
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+
+    # Attach what the moderator needs to triage: the listing, or the user's public profile
+    # target_id is stored as reported by clients; a malformed one must not break the in_() filter
+    item_ids = [e["target_id"] for e in entries if e["target_type"] == "item" and params.is_uuid(e["target_id"])]
+    items = {}
+    if item_ids:
+        rows = (
+            supabase.table("items")
+            .select("id, title, images, owner_id, status, moderation_status")
+            .in_("id", item_ids)
+            .execute()
+        ).data or []
+        items = {row["id"]: row for row in rows}
+    users = profile_cache.get_many(supabase, {e["target_id"] for e in entries if e["target_type"] == "user"})
+    for entry in entries:
+        if entry["target_type"] == "item":
+            entry["item"] = items.get(entry["target_id"])
+        else:
+            entry["user"] = users.get(entry["target_id"])
+
+    return {"targets": entries, "page": page, "page_size": page_size, "has_more": has_more}
+
+
+@router.post("/reports/targets/{target_type}/{target_id}/resolve")
+def resolve_report_target(
+    target_type: str,
+    target_id: str,
+    payload: ResolveReportPayload,
+    current_user=Depends(check_admin),
+    supabase=Depends(get_supabase),
+):
+    """Resolve or dismiss every open report on one item/user in a single call."""
+    if target_type not in ("item", "user"):
+        raise HTTPException(status_code=400, detail="Invalid target type")
+    if payload.status not in ("resolved", "dismissed"):
+        raise HTTPException(status_code=400, detail="Invalid status")
+
+    resp = supabase.rpc("resolve_report_target", {
+        "t_type": target_type,
+        "t_id": target_id,
+        "new_status": payload.status,
+        "actor_id": current_user.id,
+        "action": payload.action_taken,
+    }).execute()
+    resolved = resp.data or 0
+    if not resolved:
+        raise HTTPException(status_code=404, detail="No open reports for this target")
+
+    # Some of them may have been 'investigating', so recount rather than guess
+    admin_stats.mark_stale()
+    audit_log.record(current_user.id, "flag_resolved", target_type, target_id, f"{payload.status} ({resolved} reports)")
+
+    return {"success": True, "status": payload.status, "reports_closed": resolved}
 
 
 @router.patch("/reports/{report_id}")
@@ -355,15 +560,11 @@ def resolve_report(
         "resolved_at": "now()",
         "resolved_by": current_user.id,
     }).eq("id", report_id).execute()
+    if report.get("status") == "open":
+        admin_stats.adjust(open_reports=-1)
 
     # Log action
-    supabase.table("moderation_log").insert({
-        "moderator_id": current_user.id,
-        "action_type": "flag_resolved",
-        "target_type": "report",
-        "target_id": report_id,
-        "reason": payload.status,
-    }).execute()
+    audit_log.record(current_user.id, "flag_resolved", "report", report_id, payload.status)
 
     return {"success": True, "status": payload.status}
 
@@ -384,14 +585,10 @@ def suspend_user(
         "suspended_at": "now()",
         "suspension_reason": payload.reason,
     }).eq("id", user_id).execute()
+    profile_cache.invalidate(user_id)
+    admin_stats.mark_stale()
 
-    supabase.table("moderation_log").insert({
-        "moderator_id": current_user.id,
-        "action_type": "user_suspended",
-        "target_type": "user",
-        "target_id": user_id,
-        "reason": payload.reason,
-    }).execute()
+    audit_log.record(current_user.id, "user_suspended", "user", user_id, payload.reason)
 
     return {"success": True, "user_id": user_id, "status": "suspended"}
 
@@ -407,6 +604,8 @@ def unsuspend_user(
         "suspended_at": None,
         "suspension_reason": None,
     }).eq("id", user_id).execute()
+    profile_cache.invalidate(user_id)
+    admin_stats.mark_stale()
 
     return {"success": True, "user_id": user_id, "status": "active"}
 
@@ -416,30 +615,146 @@ def get_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, le=100),
     suspended_only: bool = Query(False),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", description="exact | planned | estimated | snapshot | none"),
     current_user=Depends(check_admin),
     supabase=Depends(get_supabase),
 ):
     """Get users list."""
-    offset = (page - 1) * page_size
-    
-    query = supabase.table("profiles").select("id, full_name, email, avatar_url, role, created_at, suspended_at, suspension_reason")
-    
-    if suspended_only:
-        query = query.neq("suspended_at", None)
-    
-    resp = query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
-    users = resp.data or []
+    result = _list_page(
+        supabase, "profiles",
+        "id, full_name, email, avatar_url, role, created_at, suspended_at, suspension_reason",
+        lambda q: q.not_.is_("suspended_at", "null") if suspended_only else q,
+        page, page_size, cursor, count,
+        snapshot_field="suspended_users" if suspended_only else "total_users",
+    )
+    return _page_response("users", result)
 
-    # Get total
-    count_resp = supabase.table("profiles").select("id", count="exact")
-    if suspended_only:
-        count_resp = count_resp.neq("suspended_at", None)
-    count = count_resp.execute().count or 0
 
-    return {
-        "users": users,
-        "page": page,
-        "page_size": page_size,
-        "total": count,
-        "has_more": offset + page_size < count,
-    }
+# ──────────────────────────────────────────────────────────────────────────────
+# BULK EXPORT
+# ──────────────────────────────────────────────────────────────────────────────
+
+# dataset -> (table, columns, column that `status` filters on)
+EXPORTS = {
+    "users": ("profiles", [
+        "id", "email", "full_name", "username", "role", "created_at", "suspended_at", "suspension_reason",
+        "items_listed", "items_swapped", "rating", "rating_count",
+    ], None),
+    "reports": ("reports", [
+        "id", "reporter_id", "reported_type", "reported_item_id", "reported_user_id", "reason", "description",
+        "status", "action_taken", "created_at", "resolved_at", "resolved_by",
+    ], "status"),
+    "items": ("items", [
+        "id", "owner_id", "title", "brand", "category", "condition", "status", "moderation_status",
+        "ai_score", "ai_verified", "created_at", "deleted_at",
+    ], "moderation_status"),
+    "moderation-log": ("moderation_log", [
+        "id", "moderator_id", "action_type", "target_type", "target_id", "reason", "created_at",
+    ], "action_type"),
+}
+
+
+def _export_batch(supabase, table: str, columns: List[str], filters: Callable, last: Optional[dict]) -> List[dict]:
+    query = filters(supabase.table(table).select(", ".join(columns)))
+    if last:
+        query = query.or_(f'created_at.gt."{last["created_at"]}",and(created_at.eq."{last["created_at"]}",id.gt.{last["id"]})')
+    return query.order("created_at").order("id").limit(EXPORT_BATCH_SIZE).execute().data or []
+
+
+def _export_rows(supabase, table: str, columns: List[str], filters: Callable, first: List[dict]) -> Iterator[dict]:
+    """Every matching row, oldest first: `first` (fetched before streaming starts), then keyset batches."""
+    rows = first
+    while True:
+        yield from rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        rows = _export_batch(supabase, table, columns, filters, rows[-1])
+
+
+# Rows are grouped into ~64 KB chunks: few enough writes to be cheap, small enough to keep memory flat
+_EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    chunk, size = [], 0
+    for row in rows:
+        line = json.dumps(row, default=str) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= _EXPORT_CHUNK_BYTES:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    yield "".join(chunk)
+
+
+# Spreadsheets evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # User-supplied text (titles, report reasons) must not run as a formula
+        return "'" + value
+    return value
+
+
+def _csv(rows: Iterator[dict], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(c)) for c in columns])
+        if buffer.tell() >= _EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@router.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", description="ndjson | csv"),
+    status: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="created_at >= this ISO timestamp"),
+    until: Optional[datetime] = Query(None, description="created_at < this ISO timestamp"),
+    current_user=Depends(check_admin),
+    supabase=Depends(get_supabase),
+):
+    """Stream a whole table (users, reports, items, moderation-log) as NDJSON or CSV."""
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export; choose one of {', '.join(EXPORTS)}")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    table, columns, status_column = EXPORTS[dataset]
+    if status and not status_column:
+        raise HTTPException(status_code=400, detail=f"{dataset} export has no status filter")
+
+    def filters(query):
+        if status:
+            query = query.eq(status_column, status)
+        if since:
+            query = query.gte("created_at", since.isoformat())
+        if until:
+            query = query.lt("created_at", until.isoformat())
+        return query
+
+    # The first batch is fetched before the 200 goes out, so a bad filter or an
+    # unreachable database is a proper error response, not a truncated body
+    try:
+        first = _export_batch(supabase, table, columns, filters, None)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Export query failed: {e}")
+    rows = _export_rows(supabase, table, columns, filters, first)
+    if format == "csv":
+        body, media_type = _csv(rows, columns), "text/csv"
+    else:
+        body, media_type = _ndjson(rows), "application/x-ndjson"
+
+    filename = f"{dataset}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.{format}"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
@@ -3,31 +3,50 @@ Email Authentication & Verification Endpoints
 Handles email verification tracking and password reset management
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
-# Import Supabase client
-try:
-    from supabase import create_client, Client
-    load_dotenv()
-    
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-    
-    if SUPABASE_URL and SUPABASE_SERVICE_KEY:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-    else:
-        supabase = None
-except ImportError:
-    supabase = None
+from services import rate_limit
+
+# Supabase client — built on first use so importing this router stays cheap
+_client = None
+
+
+def _get_client():
+    """Service-role client, or None when the SDK or credentials are missing."""
+    global _client
+    if _client is None:
+        load_dotenv()
+        url = os.getenv("SUPABASE_URL")
+        service_key = os.getenv("SUPABASE_SERVICE_KEY")
+        if not (url and service_key):
+            return None
+        try:
+            from supabase import create_client
+        except ImportError:
+            return None
+        _client = create_client(url, service_key)
+    return _client
+
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _enforce_rate_limit(rule: str, email: str, http_request: Request) -> None:
+    """429 with Retry-After once the email or client IP exceeds the rule; checked before any DB call."""
+    retry_after = rate_limit.check(rule, email=email, ip=rate_limit.client_ip(http_request))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests. Please wait {retry_after} seconds and try again",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 # ─────────────────────────────────────────────────────────────────
 # REQUEST MODELS
 # ─────────────────────────────────────────────────────────────────
@@ -126,6 +145,7 @@ async def admin_login(request: LoginRequest):
     - 401: Invalid credentials or user is not an admin
     - 500: Server error
     """
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -192,6 +212,7 @@ async def admin_signup(request: SignupRequest):
     - 409: Email already registered
     - 500: Server error
     """
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -273,6 +294,7 @@ async def get_email_verification_status(
     - `verified_at`: Timestamp when email was verified
     - `last_email_sent`: Timestamp of last verification email sent
     """
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -305,12 +327,14 @@ async def get_email_verification_status(
 )
 async def resend_verification_email(
     request: ResendVerificationEmailRequest,
+    http_request: Request,
     authorization: str = Header(None)
 ):
     """
     Resend email verification link.
     
-    **Rate limit:** 1 email per 60 seconds per user
+    **Rate limit:** 1 email per 60 seconds per user, plus per-email and
+    per-IP limits (see services/rate_limit.py)
     
     **Parameters:**
     - `email`: User's email address
@@ -321,6 +345,9 @@ async def resend_verification_email(
     - `message`: Status message
     - `reset_token_sent_at`: Timestamp when email was sent
     """
+    _enforce_rate_limit("verification_email", request.email, http_request)
+
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -377,7 +404,7 @@ async def resend_verification_email(
     summary="Initiate password reset",
     description="Send a password reset email to the user"
 )
-async def initiate_password_reset(request: PasswordResetRequest):
+async def initiate_password_reset(request: PasswordResetRequest, http_request: Request):
     """
     Start the password reset flow by sending a reset link via email.
     
@@ -392,6 +419,9 @@ async def initiate_password_reset(request: PasswordResetRequest):
     - `message`: Status message
     - `reset_token_sent_at`: Timestamp when reset was initiated
     """
+    _enforce_rate_limit("password_reset", request.email, http_request)
+
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -463,6 +493,7 @@ async def get_password_reset_attempts(
     - `attempts_in_24h`: Number of reset attempts in the last 24 hours
     - `last_attempt_at`: Timestamp of the most recent attempt
     """
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -509,6 +540,7 @@ async def mark_password_reset_completed(
     - `success`: Whether the operation succeeded
     - `completed_at`: Timestamp of completion
     """
+    supabase = _get_client()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase client not configured")
     
@@ -550,5 +582,5 @@ async def health_check():
     return {
         "status": "ok",
         "service": "email-authentication",
-        "supabase_configured": supabase is not None
+        "supabase_configured": _get_client() is not None
     }
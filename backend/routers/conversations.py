@@ -1,7 +1,12 @@
+import logging
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from pydantic import BaseModel
 from typing import Optional, List
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import params, unread_cache, profile_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
@@ -30,25 +35,30 @@ def _unread_field(conv: dict, my_id: str) -> str:
 
 @router.get("")
 def list_conversations(
+    since: Optional[datetime] = Query(None, description="ISO timestamp watermark from a previous sync"),
     current_user=Depends(get_current_user),
     supabase=Depends(get_authenticated_client),
 ):
-    """Return all conversations for current user, enriched with last message + other user profile + item."""
+    """Return all conversations for current user, enriched with last message + other user profile + item.
+
+    With `since`, only conversations changed after the watermark are returned,
+    together with the ids of conversations deleted since then and the next watermark.
+    """
     uid = current_user.id
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
 
-    # Fetch conversations where I am user1 or user2
-    resp = (
+    # Fetch conversations where I am user1 or user2 (participant profiles come from the cache)
+    query = (
         supabase.table("conversations")
-        .select(
-            "*, "
-            "user1:user1_id(id, full_name, username, avatar_url, location, rating), "
-            "user2:user2_id(id, full_name, username, avatar_url, location, rating)"
-        )
+        .select("*")
         .or_(f"user1_id.eq.{uid},user2_id.eq.{uid}")
-        .order("last_message_at", desc=True)
-        .execute()
     )
+    if since:
+        query = query.gt("updated_at", since.isoformat())
+    resp = query.order("last_message_at", desc=True).execute()
     convs = resp.data or []
+    profiles = profile_cache.get_many(get_supabase(), {c[f] for c in convs for f in ("user1_id", "user2_id")})
 
     # For each conversation, fetch last message + compute unread
     result = []
@@ -70,6 +80,8 @@ def list_conversations(
             item = last_msg.get("metadata")
 
         # Determine "other" user
+        conv["user1"] = profiles.get(conv["user1_id"])
+        conv["user2"] = profiles.get(conv["user2_id"])
         other = conv["user2"] if conv["user1_id"] == uid else conv["user1"]
         my_unread_field = "unread_user1" if conv["user1_id"] == uid else "unread_user2"
 
@@ -81,7 +93,41 @@ def list_conversations(
             "my_unread": conv.get(my_unread_field, 0),
         })
 
-    return result
+    if not since:
+        return result
+
+    # Delta sync — conversations removed by unmatch since the watermark
+    tomb_resp = (
+        supabase.table("conversation_tombstones")
+        .select("conversation_id, deleted_at")
+        .or_(f"user1_id.eq.{uid},user2_id.eq.{uid}")
+        .gt("deleted_at", since.isoformat())
+        .execute()
+    )
+    tombstones = tomb_resp.data or []
+
+    # Next watermark comes from DB timestamps so app/DB clock skew can't drop changes.
+    # Compared as datetimes: the strings differ in precision and offset format.
+    watermark = max(
+        [params.parse_timestamp(c["updated_at"]) for c in convs if c.get("updated_at")]
+        + [params.parse_timestamp(t["deleted_at"]) for t in tombstones]
+        + [since]
+    ).isoformat()
+
+    return {
+        "conversations": result,
+        "deleted": [t["conversation_id"] for t in tombstones],
+        "watermark": watermark,
+    }
+
+
+@router.get("/unread-summary")
+def get_unread_summary(
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_authenticated_client),
+):
+    """Total + per-conversation unread counts for the tab bar badge (served from memory)."""
+    return unread_cache.get_summary(supabase, current_user.id)
 
 
 @router.post("")
@@ -139,12 +185,7 @@ def get_conversation(
     uid = current_user.id
     resp = (
         supabase.table("conversations")
-        .select(
-            "*, "
-            "item:item_id(id, title, images, brand, size, condition, status, owner_id), "
-            "user1:user1_id(id, full_name, username, avatar_url, location, rating, items_listed, items_swapped), "
-            "user2:user2_id(id, full_name, username, avatar_url, location, rating, items_listed, items_swapped)"
-        )
+        .select("*, item:item_id(id, title, images, brand, size, condition, status, owner_id)")
         .eq("id", conv_id)
         .single()
         .execute()
@@ -156,9 +197,14 @@ def get_conversation(
     if conv["user1_id"] != uid and conv["user2_id"] != uid:
         raise HTTPException(status_code=403, detail="Not a participant")
 
+    profiles = profile_cache.get_many(get_supabase(), (conv["user1_id"], conv["user2_id"]))
+    conv["user1"] = profiles.get(conv["user1_id"])
+    conv["user2"] = profiles.get(conv["user2_id"])
+
     # Mark messages as read — reset my unread counter
     my_unread_field = "unread_user1" if conv["user1_id"] == uid else "unread_user2"
     supabase.table("conversations").update({my_unread_field: 0}).eq("id", conv_id).execute()
+    unread_cache.reset(uid, conv_id)
 
     other = conv["user2"] if conv["user1_id"] == uid else conv["user1"]
     return {**conv, "other_user": other}
@@ -199,6 +245,7 @@ def get_messages(
         supabase.table("messages").update({"read_at": "now()"}).eq("conversation_id", conv_id).neq("sender_id", uid).is_("read_at", "null").execute()
         my_unread_field = "unread_user1" if conv["user1_id"] == uid else "unread_user2"
         supabase.table("conversations").update({my_unread_field: 0}).eq("id", conv_id).execute()
+        unread_cache.reset(uid, conv_id)
     except Exception:
         pass
 
@@ -242,9 +289,11 @@ def send_message(
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to send message")
 
+    recipient_id = _other_user(conv, uid)
+    unread_cache.increment(recipient_id, conv_id)
+
     # Update conversation: bump last_message_at + increment recipient's unread counter
     try:
-        recipient_id = conv["user2_id"] if conv["user1_id"] == uid else conv["user1_id"]
         recipient_unread_field = "unread_user1" if conv["user1_id"] == recipient_id else "unread_user2"
         conv_detail = supabase.table("conversations").select(recipient_unread_field).eq("id", conv_id).single().execute()
         current_unread = (conv_detail.data or {}).get(recipient_unread_field, 0) or 0
@@ -313,32 +362,26 @@ def update_deal_status(
             update["status"] = "completed"
             update["completed_at"] = "now()"
             system_msg = "🎊 Swap completed! Both users confirmed the exchange."
-            
+
             # --- Swap Side Effects (Bypass RLS) ---
+            # Item status, eco points, conversation state and the system
+            # message are applied together in one transaction by the RPC.
+            # If the RPC fails its transaction rolled back: nothing is recorded
+            # (completed_by included), so the client can simply retry.
             admin_client = get_supabase()
             try:
-                # 1. Update the original item and any proposed items to 'swapped'
-                items_to_swap = set([conv["item_id"]])
-                proposals = admin_client.table("messages").select("metadata").eq("conversation_id", conv_id).eq("type", "item_proposal").execute()
-                for p in (proposals.data or []):
-                    pid = p.get("metadata", {}).get("item_id")
-                    if pid:
-                        items_to_swap.add(pid)
-                
-                for iid in items_to_swap:
-                    admin_client.table("items").update({"status": "swapped"}).eq("id", iid).execute()
-
-                # 2. Grant 200 eco_points to both users
-                user1 = admin_client.table("profiles").select("eco_points").eq("id", conv["user1_id"]).single().execute()
-                user2 = admin_client.table("profiles").select("eco_points").eq("id", conv["user2_id"]).single().execute()
-
-                p1 = (user1.data.get("eco_points") or 0) + 200 if user1.data else 200
-                p2 = (user2.data.get("eco_points") or 0) + 200 if user2.data else 200
-
-                admin_client.table("profiles").update({"eco_points": p1}).eq("id", conv["user1_id"]).execute()
-                admin_client.table("profiles").update({"eco_points": p2}).eq("id", conv["user2_id"]).execute()
-            except Exception as e:
-                print(f"Error processing swap side-effects {conv_id}: {e}")
+                resp = admin_client.rpc("complete_swap", {
+                    "conv_id": conv_id,
+                    "actor_id": uid,
+                    "system_msg": system_msg,
+                }).execute()
+            except Exception:
+                logger.exception("complete_swap failed for conversation %s", conv_id)
+                raise HTTPException(status_code=503, detail="Could not complete the swap, please try again")
+            unread_cache.increment(_other_user(conv, uid), conv_id)
+            # eco_points and items_swapped changed for both participants
+            profile_cache.invalidate(conv["user1_id"], conv["user2_id"])
+            return {**conv, **(resp.data or update)}
 
         else:
             system_msg = "✅ You marked this swap as complete. Waiting for the other party to confirm…"
@@ -365,6 +408,7 @@ def update_deal_status(
                 "content": system_msg,
                 "type": "system",
             }).execute()
+            unread_cache.increment(_other_user(conv, uid), conv_id)
         except Exception:
             pass
 
@@ -2,8 +2,12 @@ from fastapi import APIRouter, Depends, Query, HTTPException, Body
 from pydantic import BaseModel
 from typing import Optional, List
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import profile_cache, wishlist_cache, verify_jobs, phash_index
+import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/items", tags=["items"])
 
 
@@ -19,6 +23,7 @@ class ItemCreate(BaseModel):
     estimated_value: Optional[float] = None
     images: List[str] = []       # public URLs
     ai_score: Optional[float] = None
+    verify_in_background: bool = False   # ignore ai_score and queue a verification job instead
 
 
 class ItemPatch(BaseModel):
@@ -42,6 +47,13 @@ def haversine_km(lat1, lon1, lat2, lon2) -> float:
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def _attach_owners(supabase, items: List[dict]) -> None:
+    """Owner profiles from the cache — warm sellers cost nothing, misses are fetched in batches."""
+    owners = profile_cache.get_many(supabase, {item["owner_id"] for item in items})
+    for item in items:
+        item["profiles"] = owners.get(item["owner_id"])
+
+
 @router.get("/feed")
 def get_feed(
     category: Optional[str] = Query(None),
@@ -56,6 +68,7 @@ def get_feed(
     radius_km: Optional[float] = Query(None),
     page:     int = Query(1, ge=1),
     page_size: int = Query(20, le=50),
+    include_saved: bool = Query(False),
     current_user=Depends(get_current_user),
     supabase=Depends(get_authenticated_client),   # authenticated — needed for RLS on swipes
     public_supabase=Depends(get_supabase),         # anon — for reading public items
@@ -67,10 +80,10 @@ def get_feed(
     except Exception:
         seen_ids = []
 
-    # 2. Build base query — join with profiles (use public client for items)
+    # 2. Build base query (use public client for items); owners come from the profile cache below
     query = (
         public_supabase.table("items")
-        .select("*, profiles:owner_id(id, full_name, username, avatar_url, location, latitude, longitude)")
+        .select("*")
         .eq("status", "available")
         .neq("owner_id", current_user.id)
     )
@@ -99,8 +112,10 @@ def get_feed(
     # 6. Exclude seen
     result = [item for item in all_items if item["id"] not in seen_ids]
 
-    # 7. Radius filter (if lat/lng + radius provided)
-    if lat is not None and lng is not None and radius_km is not None:
+    # 7. Radius filter (if lat/lng + radius provided) — needs every candidate's owner location
+    radius_filter = lat is not None and lng is not None and radius_km is not None
+    if radius_filter:
+        _attach_owners(public_supabase, result)
         filtered = []
         for item in result:
             owner = item.get("profiles") or {}
@@ -121,6 +136,14 @@ def get_feed(
     start = (page - 1) * page_size
     end = start + page_size
     page_items = result[start:end]
+    if not radius_filter:
+        # Only the page is returned, so only its owners are looked up
+        _attach_owners(public_supabase, page_items)
+
+    if include_saved:
+        saved = set(wishlist_cache.saved_subset(public_supabase, current_user.id, [i["id"] for i in page_items]))
+        for item in page_items:
+            item["is_saved"] = item["id"] in saved
 
     return {
         "items": page_items,
@@ -137,8 +160,10 @@ def create_item(
     current_user=Depends(get_current_user),
     supabase=Depends(get_authenticated_client),
 ):
-    ai_score = payload.ai_score or 0
-    status = "available" if ai_score >= 85 else "pending_review"
+    ai_score = 0 if payload.verify_in_background else (payload.ai_score or 0)
+    # Listings with photos are published by their verification job, which first
+    # checks the photos against other users' listings (see verify_jobs)
+    status = "available" if ai_score >= 85 and not payload.images else "pending_review"
 
     # Core columns — always present in the original schema
     row = {
@@ -151,7 +176,7 @@ def create_item(
         "size": payload.size,
         "description": payload.description,
         "images": payload.images,
-        "ai_verified": ai_score >= 85,
+        "ai_verified": status == "available",
         "status": status,
     }
 
@@ -167,15 +192,24 @@ def create_item(
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to create item")
 
-    # Increment items_listed on profile (non-critical)
-    try:
-        profile = supabase.table("profiles").select("items_listed").eq("id", current_user.id).single().execute()
-        current_count = (profile.data or {}).get("items_listed", 0) or 0
-        supabase.table("profiles").update({"items_listed": current_count + 1}).eq("id", current_user.id).execute()
-    except Exception:
-        pass
-
-    return {"item": resp.data[0], "status": status, "ai_score": ai_score}
+    # items_listed on the profile is bumped by the on_item_stats_change trigger
+    profile_cache.invalidate(current_user.id)
+
+    item = resp.data[0]
+    result = {"item": item, "status": status, "ai_score": ai_score}
+    if payload.images:
+        # Without verify_in_background the client's upload-preview score is reused (no second AI call)
+        try:
+            job = verify_jobs.submit(
+                current_user.id, payload.brand, payload.category, payload.images, item_id=item["id"],
+                ai_score=None if payload.verify_in_background else ai_score,
+            )
+            result["job_id"] = job["id"]
+        except Exception:
+            # The item exists and stays pending_review; the verify sweep creates its job
+            logger.exception("Could not queue verification for item %s", item["id"])
+            result["job_id"] = None
+    return result
 
 
 @router.get("/my")
@@ -210,61 +244,32 @@ def get_item(
     return resp.data
 
 
-@router.post("/{item_id}/re-verify")
-async def re_verify_item(
+@router.post("/{item_id}/re-verify", status_code=202)
+def re_verify_item(
     item_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_authenticated_client),
 ):
-    """Re-run AI verification on a pending_review item and publish if ≥85% confident."""
-    # Fetch the item
-    item_resp = supabase.table("items").select("*").eq("id", item_id).single().execute()
+    """Queue AI re-verification; the item is published by the job if ≥85% confident.
+
+    Poll GET /verify/jobs/{job_id} for the outcome.
+    """
+    item_resp = supabase.table("items").select("owner_id, images, brand, category, moderation_status").eq("id", item_id).single().execute()
     if not item_resp.data:
         raise HTTPException(status_code=404, detail="Item not found")
     item = item_resp.data
     if item["owner_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not your item")
+    # A passing score would publish the item — a moderator's hold or rejection wins
+    if item.get("moderation_status") in verify_jobs.HELD_MODERATION_STATUSES:
+        raise HTTPException(status_code=409, detail="Item is awaiting or failed moderator review")
 
     images = item.get("images") or []
-    brand = item.get("brand", "")
-    category = item.get("category", "")
-
     if not images:
         raise HTTPException(status_code=422, detail="No images to verify")
 
-    # Call the verify endpoint logic directly
-    from routers.verify import _call_openai_sync
-    import asyncio, httpx
-
-    # Download brand-tag photo (index 1 preferred)
-    image_url = images[1] if len(images) > 1 else images[0]
-    try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            img_resp = await client.get(image_url)
-            img_resp.raise_for_status()
-            image_bytes = img_resp.content
-            mime_type = img_resp.headers.get("content-type", "image/jpeg").split(";")[0]
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Could not fetch image: {e}")
-
-    result = await asyncio.to_thread(_call_openai_sync, image_bytes, mime_type, brand, category)
-    confidence = result["confidence"]
-    new_status = "available" if confidence >= 85 else "pending_review"
-
-    update_data: dict = {"ai_verified": confidence >= 85, "status": new_status}
-    try:
-        update_data["ai_score"] = confidence
-    except Exception:
-        pass
-
-    supabase.table("items").update(update_data).eq("id", item_id).execute()
-
-    return {
-        "ai_score": confidence,
-        "verified": confidence >= 85,
-        "status": new_status,
-        "reason": result.get("reason", ""),
-    }
+    job = verify_jobs.submit(current_user.id, item.get("brand", ""), item.get("category", ""), images, item_id=item_id)
+    return {"job_id": job["id"], "status": job["status"]}
 
 
 @router.patch("/{item_id}")
@@ -275,11 +280,13 @@ def update_item(
     supabase=Depends(get_authenticated_client),
 ):
     """Allow owner to update fields (e.g. status=available to publish manually)."""
-    item_resp = supabase.table("items").select("owner_id").eq("id", item_id).single().execute()
+    item_resp = supabase.table("items").select("owner_id, moderation_status").eq("id", item_id).single().execute()
     if not item_resp.data:
         raise HTTPException(status_code=404, detail="Item not found")
     if item_resp.data["owner_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not your item")
+    if payload.status == "available" and item_resp.data.get("moderation_status") in verify_jobs.HELD_MODERATION_STATUSES:
+        raise HTTPException(status_code=409, detail="Item is awaiting or failed moderator review")
 
     update_data = {k: v for k, v in payload.dict().items() if v is not None}
     if not update_data:
@@ -302,6 +309,7 @@ def delete_item(
         raise HTTPException(status_code=403, detail="Not your item")
 
     supabase.table("items").delete().eq("id", item_id).execute()
+    phash_index.forget_item(item_id)
     return {"deleted": True}
 
 @router.get("/user/{user_id}")
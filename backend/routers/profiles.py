@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import params, profile_stats, profile_cache
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
@@ -24,59 +25,51 @@ def get_my_profile(current_user = Depends(get_current_user), supabase = Depends(
     response = supabase.table("profiles").select("*").eq("id", current_user.id).single().execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Profile not found")
-        
+
     profile = response.data
-    
-    # Calculate live stats
-    # 1. Items listed (including pending_review and available and swapped)
-    items_count_resp = supabase.table("items").select("id", count="exact").eq("owner_id", current_user.id).execute()
-    profile["items_listed"] = items_count_resp.count if items_count_resp.count is not None else 0
-    
-    # 2. Items swapped
-    swapped_count_resp = supabase.table("items").select("id", count="exact").eq("owner_id", current_user.id).eq("status", "swapped").execute()
-    profile["items_swapped"] = swapped_count_resp.count if swapped_count_resp.count is not None else 0
-    
-    # 3. Wishlist count
-    wishlist_count_resp = supabase.table("wishlists").select("id", count="exact").eq("user_id", current_user.id).execute()
-    profile["wishlist_count"] = wishlist_count_resp.count if wishlist_count_resp.count is not None else 0
-
-    # 4. Average Rating
-    reviews_resp = supabase.table("reviews").select("rating").eq("reviewee_id", current_user.id).execute()
-    if reviews_resp.data:
-        ratings = [r["rating"] for r in reviews_resp.data]
-        profile["rating"] = round(sum(ratings) / len(ratings), 1)
-    else:
-        profile["rating"] = 0.0
-
-    # 5. Eco points (read from DB — updated on swap completion)
+
+    # Stats are maintained on the row by DB triggers (see DB/migration_profile_stats.sql)
+    profile["items_listed"] = profile.get("items_listed") or 0
+    profile["items_swapped"] = profile.get("items_swapped") or 0
+    profile["wishlist_count"] = profile.get("wishlist_count") or 0
+    profile["rating"] = profile_stats.average_rating(profile)
+    profile["rating_count"] = profile.get("rating_count") or 0
+    profile["rating_histogram"] = profile_stats.rating_histogram(profile)
+
+    # Eco points (read from DB — updated on swap completion)
     profile["eco_points"] = profile.get("eco_points") or 0
 
     return profile
 
+MAX_BATCH_PROFILES = 100
+
+@router.get("")
+def get_profiles_batch(
+    ids: str = Query(..., description="Comma-separated user ids"),
+    current_user = Depends(get_current_user),
+    supabase = Depends(get_supabase),
+):
+    """Public profiles with stats for many users at once (one upstream query for cache misses)."""
+    requested = [i.strip() for i in ids.split(",") if i.strip()]
+    if not requested:
+        raise HTTPException(status_code=400, detail="ids must contain at least one user id")
+    if len(requested) > MAX_BATCH_PROFILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PROFILES} ids per request")
+    # Ids end up in an in_() filter
+    user_ids = list(dict.fromkeys(params.parse_uuid(i, "ids") for i in requested))
+
+    found = profile_cache.get_many(supabase, user_ids)
+    return {
+        "profiles": [profile_cache.public(found[uid]) for uid in user_ids if uid in found],
+        "missing": [uid for uid in user_ids if uid not in found],
+    }
+
 @router.get("/{user_id}")
 def get_user_profile(user_id: str, supabase = Depends(get_supabase)):
     """Get a public user profile (limited info for matched users)."""
-    response = supabase.table("profiles").select("id, full_name, username, avatar_url, location, latitude, longitude, eco_points, created_at").eq("id", user_id).single().execute()
-    if not response.data:
+    profile = profile_cache.get(supabase, user_id)
+    if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    
-    profile = response.data
-    
-    # 1. Items swapped
-    swapped_count_resp = supabase.table("items").select("id", count="exact").eq("owner_id", user_id).eq("status", "swapped").execute()
-    profile["items_swapped"] = swapped_count_resp.count if swapped_count_resp.count is not None else 0
-    
-    # 2. Average Rating
-    reviews_resp = supabase.table("reviews").select("rating").eq("reviewee_id", user_id).execute()
-    if reviews_resp.data:
-        ratings = [r["rating"] for r in reviews_resp.data]
-        profile["rating"] = round(sum(ratings) / len(ratings), 1)
-    else:
-        profile["rating"] = 0.0
-
-    # 3. Eco points
-    profile["eco_points"] = profile.get("eco_points") or 0
-
     return profile
 
 @router.put("/me")
@@ -99,6 +92,7 @@ def update_my_profile(
     if not response.data:
         raise HTTPException(status_code=500, detail="Profile update failed")
 
+    profile_cache.invalidate(current_user.id)
     return response.data[0]
 
 @router.patch("/me")
@@ -123,4 +117,5 @@ def patch_my_profile(
     if not response.data:
         raise HTTPException(status_code=404, detail="Profile not found")
 
+    profile_cache.invalidate(current_user.id)
     return response.data[0]
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import params, profile_cache, profile_stats
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -50,6 +51,7 @@ def create_review(
 
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to save review")
+    profile_cache.invalidate(payload.reviewee_id)
 
     # Add 100 points for a 5-star review (bypass RLS)
     if payload.rating == 5:
@@ -68,25 +70,33 @@ def create_review(
 @router.get("/{user_id}")
 def get_user_reviews(
     user_id: str,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     supabase=Depends(get_supabase) # Anyone can read
 ):
-    """Get all reviews written about a specific user."""
-    resp = (
+    """Reviews written about a specific user, newest first, plus their rating aggregates."""
+    user_id = params.parse_uuid(user_id, "user_id")
+    query = (
         supabase.table("reviews")
         .select("*, reviewer:reviewer_id(id, full_name, avatar_url, username)")
         .eq("reviewee_id", user_id)
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
     )
-    
-    # Calculate average
+    if cursor:
+        query = query.or_(params.keyset_before(cursor))
+
+    # One extra row tells us whether another page exists
+    resp = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
     reviews = resp.data or []
-    average = sum([r["rating"] for r in reviews]) / len(reviews) if reviews else 0.0
-    
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+
+    # Aggregates are maintained per profile, so they're correct at any review count
+    profile = profile_cache.get(supabase, user_id) or {}
+
     return {
         "reviews": reviews,
-        "average_rating": round(average, 1),
-        "total_count": len(reviews)
+        "average_rating": profile.get("rating", 0.0),
+        "total_count": profile.get("rating_count", 0),
+        "histogram": profile.get("rating_histogram") or profile_stats.rating_histogram({}),
+        "next_cursor": params.encode_cursor(reviews[-1]) if has_more else None,
     }
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from dependencies import get_supabase, get_current_user, get_authenticated_client
+from services import unread_cache
 
 router = APIRouter(prefix="/swipes", tags=["swipes"])
 
@@ -110,6 +111,7 @@ def record_swipe(
             # (User B) so they see a badge
             # u1 = min(swiper, owner), u2 = max; determine which slot the owner occupies
             owner_unread_field = "unread_user1" if owner_id == u1 else "unread_user2"
+            unread_cache.increment(owner_id, conversation_id)
             try:
                 conv_data = public_supabase.table("conversations").select(owner_unread_field).eq("id", conversation_id).single().execute()
                 current_unread = (conv_data.data or {}).get(owner_unread_field, 0) or 0
@@ -151,7 +153,9 @@ def unmatch_user(
     
     # Delete conversation between these two users
     try:
-        supabase.table("conversations").delete().eq("user1_id", u1).eq("user2_id", u2).execute()
+        resp = supabase.table("conversations").delete().eq("user1_id", u1).eq("user2_id", u2).execute()
+        for conv in resp.data or []:
+            unread_cache.forget_conversation((u1, u2), conv["id"])
         return {"unmatched": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to unmatch: {str(e)}")
@@ -1,24 +1,8 @@
-import os
-import json
-import re
-import asyncio
-import httpx
-import base64
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import List
-from dotenv import load_dotenv
-
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Configure the SDK once at startup
-try:
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    _SDK_AVAILABLE = True
-except ImportError:
-    _SDK_AVAILABLE = False
+from typing import List, Optional
+from dependencies import get_current_user
+from services import verifier, image_prep, verify_jobs
 
 router = APIRouter(prefix="/verify", tags=["verify"])
 
@@ -27,84 +11,33 @@ class VerifyRequest(BaseModel):
     brand: str
     category: str = None
     image_urls: List[str]
+    # "single" (brand-tag photo only) or "all" (every photo, fused score)
+    mode: Optional[str] = None
 
 
-def _call_openai_sync(image_bytes: bytes, mime_type: str, brand: str, category: str = None) -> dict:
-    """Synchronous OpenAI call  runs in a thread via asyncio.to_thread."""
-    if not _SDK_AVAILABLE:
-        return {"confidence": 0, "reason": "openai SDK not installed"}
-
-    cat_str = f" ({category})" if category else ""
-    prompt = (
-        f'You are a fashion authentication expert. '
-        f'Examine this item image{cat_str}. '
-        f'Does it show a genuine item from the brand "{brand}"? '
-        f'Check for correct features, brand labels, logos, tags, and stitching quality typical for {category or "this type of product"}. '
-        f'Reply ONLY with JSON (no markdown): {{"confidence": <0-100 integer>, "reason": "<one sentence>"}}'
-    )
-
-    base64_image = base64.b64encode(image_bytes).decode('utf-8')
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=300,
-        )
-        
-        text = response.choices[0].message.content.strip()
-        # Strip markdown code fences if present
-        text = re.sub(r'^```json\s*|\s*```$', '', text, flags=re.DOTALL).strip()
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            parsed = json.loads(json_match.group())
-            return {
-                "confidence": int(parsed.get("confidence", 0)),
-                "reason": parsed.get("reason", ""),
-            }
-    except Exception as e:
-        return {"confidence": 0, "reason": f"AI error: {str(e)}"}
-
-    return {"confidence": 0, "reason": "Failed to parse OpenAI response"}
+def _check_mode(payload: VerifyRequest):
+    if payload.mode is not None and payload.mode not in verifier.VERIFY_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(verifier.VERIFY_MODES)}")
 
 
 @router.post("/item")
 async def verify_item(payload: VerifyRequest):
-    if not OPENAI_API_KEY:
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured")
+    if not verifier.is_configured():
+        raise HTTPException(status_code=500, detail="AI verification backend not configured")
 
     if not payload.image_urls:
         raise HTTPException(status_code=400, detail="At least one image URL required")
+    _check_mode(payload)
 
-    # Prefer brand-tag photo (slot index 1), fallback to first
-    image_url = payload.image_urls[1] if len(payload.image_urls) > 1 else payload.image_urls[0]
-
-    # Download image
     try:
-        async with httpx.AsyncClient(timeout=20) as http_client:
-            img_resp = await http_client.get(image_url)
-            img_resp.raise_for_status()
-            image_bytes = img_resp.content
-            mime_type = img_resp.headers.get("content-type", "image/jpeg").split(";")[0]
+        result = await verifier.verify_listing(
+            payload.image_urls, payload.brand, payload.category, mode=payload.mode, threshold=75,
+        )
+    except image_prep.ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Could not fetch image: {e}")
 
-    # Run SDK call in thread pool (SDK is synchronous)
-    result = await asyncio.to_thread(_call_openai_sync, image_bytes, mime_type, payload.brand)
-
     confidence = result["confidence"]
     reason = result["reason"]
 
@@ -113,4 +46,35 @@ async def verify_item(payload: VerifyRequest):
         "verified": confidence >= 75,
         "reason": reason,
         "status": "available" if confidence >= 75 else "pending_review",
+        "cached": result["cached"],
+        "images": result.get("images"),
+    }
+
+
+@router.post("/jobs", status_code=202)
+def submit_verify_job(payload: VerifyRequest, current_user=Depends(get_current_user)):
+    """Queue a verification and return immediately; poll GET /verify/jobs/{id} for the result."""
+    if not verifier.is_configured():
+        raise HTTPException(status_code=500, detail="AI verification backend not configured")
+    if not payload.image_urls:
+        raise HTTPException(status_code=400, detail="At least one image URL required")
+    _check_mode(payload)
+
+    job = verify_jobs.submit(current_user.id, payload.brand, payload.category, payload.image_urls, mode=payload.mode)
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+@router.get("/jobs/{job_id}")
+def get_verify_job(job_id: str, current_user=Depends(get_current_user)):
+    job = verify_jobs.get_job(job_id)
+    if not job or job["owner_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "item_id": job.get("item_id"),
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at"),
     }
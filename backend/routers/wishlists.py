@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from dependencies import get_supabase, get_current_user, get_authenticated_client
+from typing import List
+from dependencies import get_supabase, get_current_user
+from services import wishlist_cache
 
 router = APIRouter(prefix="/wishlists", tags=["wishlists"])
 
@@ -9,6 +11,43 @@ class WishlistAdd(BaseModel):
     item_id: str
 
 
+class WishlistItems(BaseModel):
+    item_ids: List[str]
+
+
+MAX_CHECK_ITEMS = 200
+MAX_BULK_ITEMS = 100
+
+
+def _add_items(user_id: str, item_ids: List[str]) -> List[str]:
+    """Insert missing rows in one statement; returns the ids that were newly saved.
+
+    wishlist_count is adjusted by the statement-level trigger by exactly that many.
+    """
+    # Service client: the RPC takes the already-validated user id explicitly
+    resp = get_supabase().rpc("wishlist_add_items", {"uid": user_id, "item_ids": item_ids}).execute()
+    added = resp.data or []
+    wishlist_cache.add(user_id, added)
+    return added
+
+
+def _remove_items(user_id: str, item_ids: List[str]) -> List[str]:
+    """Delete saved rows in one statement; returns the ids that were actually removed."""
+    resp = get_supabase().rpc("wishlist_remove_items", {"uid": user_id, "item_ids": item_ids}).execute()
+    removed = resp.data or []
+    wishlist_cache.remove(user_id, removed)
+    return removed
+
+
+def _bulk_ids(payload: WishlistItems) -> List[str]:
+    item_ids = list(dict.fromkeys(payload.item_ids))
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="item_ids must not be empty")
+    if len(item_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} item ids per request")
+    return item_ids
+
+
 @router.get("")
 def get_my_wishlist(
     current_user=Depends(get_current_user),
@@ -28,36 +67,38 @@ def get_my_wishlist(
 def add_to_wishlist(
     payload: WishlistAdd,
     current_user=Depends(get_current_user),
-    supabase=Depends(get_authenticated_client),
 ):
-    # Upsert to handle duplicate saves gracefully
-    resp = supabase.table("wishlists").upsert({
-        "user_id": current_user.id,
-        "item_id": payload.item_id,
-    }, on_conflict="user_id,item_id").execute()
+    # Duplicate saves are a no-op and leave wishlist_count untouched
+    added = _add_items(current_user.id, [payload.item_id])
+    return {"saved": True, "item_id": payload.item_id, "added": bool(added)}
 
-    # Increment wishlist_count on the user's profile
-    # We use the service client here because the RPC function might not be exposed to the anon role
-    from dependencies import get_supabase
-    service_client = get_supabase()
-    service_client.rpc("increment_wishlist_count", {"uid": current_user.id}).execute()
 
-    return resp.data[0] if resp.data else {"saved": True}
+@router.post("/bulk")
+def add_many_to_wishlist(
+    payload: WishlistItems,
+    current_user=Depends(get_current_user),
+):
+    """Save many items in one round trip (set semantics: already-saved ids are skipped)."""
+    added = _add_items(current_user.id, _bulk_ids(payload))
+    return {"added": added, "count": len(added)}
+
+
+@router.post("/bulk-remove")
+def remove_many_from_wishlist(
+    payload: WishlistItems,
+    current_user=Depends(get_current_user),
+):
+    """Unsave many items in one round trip (ids that weren't saved are skipped)."""
+    removed = _remove_items(current_user.id, _bulk_ids(payload))
+    return {"removed": removed, "count": len(removed)}
 
 
 @router.delete("/{item_id}")
 def remove_from_wishlist(
     item_id: str,
     current_user=Depends(get_current_user),
-    supabase=Depends(get_authenticated_client),
 ):
-    supabase.table("wishlists").delete().eq("user_id", current_user.id).eq("item_id", item_id).execute()
-
-    # Decrement wishlist_count (floor at 0)
-    from dependencies import get_supabase
-    service_client = get_supabase()
-    service_client.rpc("decrement_wishlist_count", {"uid": current_user.id}).execute()
-
+    _remove_items(current_user.id, [item_id])
     return {"removed": True}
 
 
@@ -67,11 +108,16 @@ def check_wishlist(
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
 ):
-    resp = (
-        supabase.table("wishlists")
-        .select("id")
-        .eq("user_id", current_user.id)
-        .eq("item_id", item_id)
-        .execute()
-    )
-    return {"saved": bool(resp.data)}
+    return {"saved": wishlist_cache.is_saved(supabase, current_user.id, item_id)}
+
+
+@router.post("/check")
+def check_wishlist_batch(
+    payload: WishlistItems,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """Which of the given items the current user has saved — one call per rendered page."""
+    if len(payload.item_ids) > MAX_CHECK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CHECK_ITEMS} item ids per request")
+    return {"saved": wishlist_cache.saved_subset(supabase, current_user.id, payload.item_ids)}
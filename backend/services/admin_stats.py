@@ -0,0 +1,94 @@
+"""
+Snapshot of the admin dashboard counters.
+
+The counts (pending reviews, open reports, suspended users, live items,
+users) are computed together by the admin_dashboard_stats() RPC in a
+background loop, so GET /admin/dashboard is a dict copy. Moderation and
+report events nudge the snapshot in place when the exact delta is known;
+anything else (suspensions, whose previous state isn't read) asks the loop
+for an early refresh. Each worker keeps its own snapshot; the periodic
+refresh bounds drift from other workers' events to one interval.
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from dependencies import get_supabase
+
+REFRESH_INTERVAL_SECONDS = int(os.environ.get("ADMIN_STATS_REFRESH_INTERVAL", "30"))
+
+FIELDS = ("pending_reviews", "open_reports", "suspended_users", "total_items", "total_users")
+
+_lock = threading.Lock()
+_snapshot: Optional[dict] = None
+_refreshed_at: Optional[datetime] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wake: Optional[asyncio.Event] = None
+
+
+def refresh() -> dict:
+    """Recompute every counter in one round trip and replace the snapshot."""
+    global _snapshot, _refreshed_at
+    data = get_supabase().rpc("admin_dashboard_stats", {}).execute().data or {}
+    counts = {field: int(data.get(field) or 0) for field in FIELDS}
+    with _lock:
+        _snapshot = counts
+        _refreshed_at = datetime.now(timezone.utc)
+    return counts
+
+
+def _stale_after() -> datetime:
+    return _refreshed_at + timedelta(seconds=REFRESH_INTERVAL_SECONDS)
+
+
+def snapshot() -> dict:
+    """Current counters plus refreshed_at / stale_after.
+
+    Computes synchronously only on a cold start, or when no background loop
+    is running (scripts, interval <= 0) and the snapshot has gone stale.
+    """
+    if _snapshot is None or (_loop is None and datetime.now(timezone.utc) > _stale_after()):
+        refresh()
+    with _lock:
+        return {
+            **_snapshot,
+            "refreshed_at": _refreshed_at.isoformat(),
+            "stale_after": _stale_after().isoformat(),
+        }
+
+
+def adjust(**deltas: int) -> None:
+    """Apply a known change (e.g. pending_reviews=-1) without waiting for the next refresh."""
+    with _lock:
+        if _snapshot is None:
+            return
+        for field, delta in deltas.items():
+            _snapshot[field] = max(_snapshot[field] + delta, 0)
+
+
+def mark_stale() -> None:
+    """Ask the background loop to refresh now. Safe to call from sync routes (threadpool)."""
+    if _loop is not None and _wake is not None:
+        _loop.call_soon_threadsafe(_wake.set)
+
+
+async def refresh_forever(interval: int = REFRESH_INTERVAL_SECONDS):
+    """Background loop started by main.py; interval <= 0 disables it (snapshot() then refreshes on demand)."""
+    global _loop, _wake
+    if interval <= 0:
+        return
+    _loop = asyncio.get_running_loop()
+    _wake = asyncio.Event()
+    while True:
+        try:
+            await asyncio.to_thread(refresh)
+        except Exception as e:
+            print(f"Admin stats refresh failed: {e}")
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
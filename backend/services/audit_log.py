@@ -0,0 +1,224 @@
+"""
+Buffered writer for the moderation_log audit trail.
+
+Admin actions call record(), which appends the entry to a local spool file
+and an in-memory buffer and returns — no database round trip on the request
+path. A background loop flushes the buffer as one multi-row insert every
+AUDIT_FLUSH_INTERVAL seconds, or as soon as AUDIT_FLUSH_SIZE entries are
+waiting, and a final flush runs on shutdown.
+
+Durability: the spool (one JSON line per pending entry, one file per
+process under AUDIT_SPOOL_DIR) is written before record() returns and is
+truncated only after the entries are in the database. On startup, spools
+left by processes that are no longer running are replayed. Every entry
+carries its own id and inserts ignore duplicates, so an entry that was
+flushed just before a crash is not logged twice.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from dependencies import get_supabase
+
+FLUSH_SIZE = int(os.environ.get("AUDIT_FLUSH_SIZE", "50"))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "2"))
+SPOOL_DIR = os.environ.get("AUDIT_SPOOL_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".audit_spool"))
+# fsync every record (survives power loss, not just a process crash); costs ~a disk flush per admin action
+FSYNC = os.environ.get("AUDIT_FSYNC", "0") == "1"
+
+_lock = threading.Lock()          # buffer + spool file
+_flush_lock = threading.Lock()    # one flush at a time
+_buffer: List[dict] = []
+_spool = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wake: Optional[asyncio.Event] = None
+_task: Optional[asyncio.Task] = None
+_flushed = 0
+_rejected = 0
+
+
+def _spool_path(pid: int) -> str:
+    return os.path.join(SPOOL_DIR, f"moderation_log.{pid}.jsonl")
+
+
+def _open_spool():
+    """Caller holds _lock."""
+    global _spool
+    if _spool is None:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        _spool = open(_spool_path(os.getpid()), "a", encoding="utf-8")
+    return _spool
+
+
+def _write_spool(entries: List[dict]) -> None:
+    """Caller holds _lock."""
+    spool = _open_spool()
+    for entry in entries:
+        spool.write(json.dumps(entry) + "\n")
+    spool.flush()
+    if FSYNC:
+        os.fsync(spool.fileno())
+
+
+def _rewrite_spool() -> None:
+    """Caller holds _lock. The spool mirrors exactly what is still buffered."""
+    spool = _open_spool()
+    spool.seek(0)
+    spool.truncate()
+    _write_spool(_buffer)
+
+
+def record(moderator_id: str, action_type: str, target_type: str, target_id: str, reason: Optional[str] = None) -> None:
+    record_many([{
+        "moderator_id": moderator_id,
+        "action_type": action_type,
+        "target_type": target_type,
+        "target_id": target_id,
+        "reason": reason,
+    }])
+
+
+def record_many(entries: List[dict]) -> None:
+    """Queue moderation_log rows; durable once this returns."""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [{"id": str(uuid.uuid4()), "created_at": now, **entry} for entry in entries]
+    with _lock:
+        _write_spool(rows)
+        _buffer.extend(rows)
+        full = len(_buffer) >= FLUSH_SIZE
+    if full and _loop is not None and _wake is not None:
+        _loop.call_soon_threadsafe(_wake.set)
+
+
+def _insert(rows: List[dict]) -> None:
+    get_supabase().table("moderation_log").upsert(rows, on_conflict="id", ignore_duplicates=True).execute()
+
+
+def _reject(rows: List[dict], error: Exception) -> None:
+    """Rows the database refuses (e.g. a constraint) must not block the rest; keep them for inspection."""
+    global _rejected
+    _rejected += len(rows)
+    print(f"moderation_log rejected {len(rows)} entries: {error}")
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    with open(os.path.join(SPOOL_DIR, "moderation_log.rejected.jsonl"), "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def flush() -> int:
+    """Insert everything buffered so far. Returns the number of entries written. Blocking."""
+    global _flushed
+    try:
+        from postgrest.exceptions import APIError
+    except ImportError:  # very old postgrest-py
+        APIError = Exception
+
+    with _flush_lock:
+        with _lock:
+            batch = list(_buffer)
+        if not batch:
+            return 0
+
+        try:
+            _insert(batch)
+            written = batch
+        except APIError:
+            # The server refused the batch — find the offending rows one by one
+            written = []
+            for row in batch:
+                try:
+                    _insert([row])
+                    written.append(row)
+                except APIError as e:
+                    _reject([row], e)
+        except Exception as e:
+            # Database unreachable: keep everything spooled and retry next tick
+            print(f"moderation_log flush failed, will retry: {e}")
+            return 0
+
+        with _lock:
+            # Entries recorded during the insert stay buffered
+            del _buffer[:len(batch)]
+            _rewrite_spool()
+        _flushed += len(written)
+        return len(written)
+
+
+def _replay_orphaned_spools() -> None:
+    """Load spools left by processes that are no longer running."""
+    if not os.path.isdir(SPOOL_DIR):
+        return
+    for path in glob.glob(os.path.join(SPOOL_DIR, "moderation_log.*.jsonl")):
+        try:
+            pid = int(os.path.basename(path).split(".")[1])
+        except ValueError:
+            continue   # the rejected-entries file
+        if pid == os.getpid():
+            if _spool is not None:
+                continue   # our own live spool
+        else:
+            try:
+                os.kill(pid, 0)
+                continue   # still alive — its owner flushes it
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                continue
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        own_file = path == _spool_path(os.getpid())
+        if own_file:
+            # Left by an earlier process with our pid; we're about to reopen it for appending
+            os.remove(path)
+        with _lock:
+            _write_spool(rows)
+            _buffer.extend(rows)
+        if not own_file:
+            os.remove(path)
+
+
+async def _flush_forever() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            print(f"moderation_log flush failed: {e}")
+
+
+async def start() -> None:
+    global _loop, _wake, _task
+    _loop = asyncio.get_running_loop()
+    _wake = asyncio.Event()
+    try:
+        await asyncio.to_thread(_replay_orphaned_spools)
+    except Exception as e:
+        print(f"Could not replay moderation_log spools: {e}")
+    _task = asyncio.create_task(_flush_forever())
+
+
+async def stop() -> None:
+    """Stop the loop and flush what's left (anything unflushed stays in the spool for the next start)."""
+    global _task, _loop, _wake
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+    _loop = _wake = None
+    await asyncio.to_thread(flush)
+
+
+def stats() -> dict:
+    with _lock:
+        buffered = len(_buffer)
+    return {"buffered": buffered, "flushed": _flushed, "rejected": _rejected}
@@ -0,0 +1,79 @@
+"""
+Background cascade for admin item deletion.
+
+delete_item() hides the item and records an `item_cleanup_jobs` row in one
+transaction (the admin_delete_item RPC); the item's wishlists and swipes
+rows are then removed here, in batches of CLEANUP_BATCH_SIZE with a short
+pause between batches, so a popular item's cascade never runs as one long
+delete on the request path. Progress is stored after every batch and
+exposed via GET /admin/cleanup-jobs/{id}. Queued, failed-and-retrying and
+abandoned jobs are handled by services/job_runner.py — deletes are
+idempotent, so a retried job simply carries on.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from dependencies import get_supabase
+from services.job_runner import JobRunner
+
+BATCH_SIZE = int(os.environ.get("CLEANUP_BATCH_SIZE", "500"))
+BATCH_PAUSE_SECONDS = float(os.environ.get("CLEANUP_BATCH_PAUSE", "0.2"))
+# A running job whose heartbeat is older than this is treated as abandoned
+STALE_AFTER_SECONDS = 300
+
+# Tables holding rows that reference a deleted item, in cleanup order
+TABLES = ("wishlists", "swipes")
+
+
+def delete_item(item_id: str, requested_by: str) -> Optional[dict]:
+    """Soft-delete the item and queue its cascade; the job row, or None if the item is gone. Blocking."""
+    job = get_supabase().rpc("admin_delete_item", {
+        "target_item": item_id,
+        "actor_id": requested_by,
+    }).execute().data
+    if job:
+        _runner.enqueue(job["id"])
+    return job
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    return _runner.get(job_id)
+
+
+def _delete_batch(item_id: str, table: str) -> int:
+    resp = get_supabase().rpc("cleanup_item_batch", {
+        "target_item": item_id,
+        "target_table": table,
+        "batch_size": BATCH_SIZE,
+    }).execute()
+    return resp.data or 0
+
+
+async def _run(job: dict) -> dict:
+    progress = {table: 0 for table in TABLES}
+    progress.update(job.get("progress") or {})
+    for table in TABLES:
+        while True:
+            # An error propagates to the runner, which retries the job later
+            removed = await asyncio.to_thread(_delete_batch, job["item_id"], table)
+            progress[table] += removed
+            await asyncio.to_thread(_runner.heartbeat, job["id"], progress=progress)
+            if removed < BATCH_SIZE:
+                break
+            # Spread large cascades out instead of hammering the database
+            await asyncio.sleep(BATCH_PAUSE_SECONDS)
+    return {"progress": progress}
+
+
+# One worker per process keeps cascades sequential, which is the point
+_runner = JobRunner(
+    "item_cleanup_jobs", _run,
+    workers=1, stale_after=STALE_AFTER_SECONDS, stale_column="heartbeat_at",
+    max_attempts=5, retry_base_seconds=30,
+)
+
+start = _runner.start
+stop = _runner.stop
+stats = _runner.stats
@@ -0,0 +1,104 @@
+"""
+Image preprocessing for AI verification.
+
+Downloads are streamed with a hard size cap. Images are decoded, resized to
+the resolution the vision model actually uses, and re-encoded as compact
+JPEG with the MIME type labelled correctly. Everything except fetch_image()
+is a pure bytes -> bytes function, so it can be exercised offline on
+fixture images.
+
+Pillow is optional: without it images pass through unchanged and only the
+MIME type is sniffed from the file's magic bytes.
+"""
+
+import io
+import os
+from typing import Optional, Tuple
+
+import httpx
+
+try:
+    from PIL import Image, ImageOps
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+MAX_DOWNLOAD_BYTES = int(os.environ.get("VERIFY_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+# gpt-4o-mini tiles high-detail images at 512px after fitting the short side
+# to 768px, so anything larger only costs upload bytes and latency
+MAX_SIDE = int(os.environ.get("VERIFY_IMAGE_MAX_SIDE", "1024"))
+JPEG_QUALITY = 85
+# Formats the vision model accepts as-is; anything else must be re-encoded
+MODEL_MIME_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_mime(data: bytes) -> Optional[str]:
+    """MIME type from the file's magic bytes, or None if unrecognised."""
+    for signature, mime in _SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    return None
+
+
+async def fetch_image(client: httpx.AsyncClient, url: str, max_bytes: int = MAX_DOWNLOAD_BYTES) -> Tuple[bytes, str]:
+    """Stream an image, aborting as soon as it exceeds max_bytes. Returns (bytes, declared content type)."""
+    async with client.stream("GET", url) as resp:
+        resp.raise_for_status()
+        declared = int(resp.headers.get("content-length") or 0)
+        if declared > max_bytes:
+            raise ImageTooLarge(f"Image is {declared} bytes (limit {max_bytes})")
+
+        chunks = []
+        received = 0
+        async for chunk in resp.aiter_bytes():
+            received += len(chunk)
+            if received > max_bytes:
+                raise ImageTooLarge(f"Image exceeds {max_bytes} bytes")
+            chunks.append(chunk)
+
+        content_type = resp.headers.get("content-type", "image/jpeg").split(";")[0].strip()
+    return b"".join(chunks), content_type
+
+
+def prepare_for_model(data: bytes, declared_mime: Optional[str] = None, max_side: int = MAX_SIDE) -> Tuple[bytes, str]:
+    """Downsize + re-encode an image for the model. Returns (bytes, correct MIME type).
+
+    Falls back to the original bytes when Pillow is missing or can't decode the image.
+    """
+    fallback = (data, sniff_mime(data) or declared_mime or "image/jpeg")
+    if not _PIL_AVAILABLE:
+        return fallback
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((max_side, max_side))
+            out = io.BytesIO()
+            img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    except Exception:
+        return fallback
+
+    encoded = out.getvalue()
+    # A small, already-compressed image may come out larger after re-encoding:
+    # send whichever is smaller, as long as the model can read the original
+    if fallback[1] in MODEL_MIME_TYPES and len(encoded) >= len(data):
+        return fallback
+    return encoded, "image/jpeg"
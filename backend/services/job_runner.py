@@ -0,0 +1,210 @@
+"""
+Database-backed background jobs worked by asyncio workers in every API process.
+
+A job is a row in its own table (verification_jobs, item_cleanup_jobs)
+with status queued → running → done | failed. Submitting inserts the row
+and hands its id to this process's workers; claiming is a conditional
+update, so a job runs once even if several processes see it. Rows are the
+source of truth, so nothing is lost when a process dies:
+
+  * abandoned jobs — still running after STALE_AFTER seconds without
+    progress (their worker crashed or was redeployed) — may be claimed again
+  * a run that raises is retried with exponential backoff (status back to
+    queued, retry_at in the future) until max_attempts, then marked failed
+  * a sweep in every process re-enqueues claimable rows at startup and then
+    every SWEEP_INTERVAL_SECONDS, covering both of the above and jobs
+    submitted while no worker was running
+
+Job tables need: id, status, error, created_at, started_at, finished_at,
+attempts, retry_at, plus the column used to detect abandonment
+(started_at, or heartbeat_at for long jobs that call heartbeat()).
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from dependencies import get_supabase
+
+SWEEP_INTERVAL_SECONDS = 60
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobRunner:
+    """run(job) does the work and returns extra columns to store with status=done.
+
+    It may set "status": "failed" itself for outcomes that must not be
+    retried; raising means "try again later".
+    """
+
+    def __init__(self, table: str, run: Callable[[dict], Awaitable[Optional[dict]]], *,
+                 workers: int, stale_after: int, stale_column: str = "started_at",
+                 max_attempts: int = 5, retry_base_seconds: float = 30,
+                 sweep_hook: Optional[Callable[[], None]] = None):
+        self.table = table
+        self.run = run
+        self.workers = workers
+        self.stale_after = stale_after
+        self.stale_column = stale_column
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        # Extra blocking work for every sweep (e.g. creating jobs that should exist)
+        self.sweep_hook = sweep_hook
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._enqueued: set = set()   # ids waiting in or being run from _queue — never added twice
+        self._retried = 0
+
+    # ── Submitting (any thread) ──────────────────────────────────────────────
+
+    def submit(self, row: dict) -> dict:
+        """Insert a job row and hand it to the workers. Blocking; fine from sync routes (threadpool)."""
+        job = get_supabase().table(self.table).insert(row).execute().data[0]
+        self.enqueue(job["id"])
+        return job
+
+    def enqueue(self, job_id: str) -> None:
+        if self._loop is None or self._queue is None:
+            # Workers not started (e.g. scripts) — the row stays queued and is
+            # picked up by the next sweep of a running process
+            return
+        self._loop.call_soon_threadsafe(self._put, job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        resp = get_supabase().table(self.table).select("*").eq("id", job_id).execute()
+        return (resp.data or [None])[0]
+
+    def heartbeat(self, job_id: str, **fields) -> None:
+        """Record progress; keeps a long job from being taken over as abandoned. Blocking."""
+        get_supabase().table(self.table).update({
+            "heartbeat_at": _now().isoformat(), **fields,
+        }).eq("id", job_id).execute()
+
+    # ── Claiming ─────────────────────────────────────────────────────────────
+
+    def _claimable(self) -> str:
+        """PostgREST or-filter: due queued jobs, or running jobs whose worker stopped."""
+        now = _now()
+        stale = (now - timedelta(seconds=self.stale_after)).isoformat()
+        return (
+            f'and(status.eq.queued,or(retry_at.is.null,retry_at.lte."{now.isoformat()}")),'
+            f'and(status.eq.running,{self.stale_column}.lt."{stale}")'
+        )
+
+    def _claim(self, job_id: str) -> Optional[dict]:
+        now = _now().isoformat()
+        update = {"status": "running", "started_at": now}
+        if self.stale_column != "started_at":
+            update[self.stale_column] = now
+        resp = (
+            get_supabase().table(self.table)
+            .update(update)
+            .eq("id", job_id)
+            .or_(self._claimable())
+            .execute()
+        )
+        return (resp.data or [None])[0]
+
+    def _resumable(self) -> List[str]:
+        resp = get_supabase().table(self.table).select("id").or_(self._claimable()).order("created_at").execute()
+        return [row["id"] for row in resp.data or []]
+
+    # ── Finishing ────────────────────────────────────────────────────────────
+
+    def _finish(self, job: dict, fields: Optional[dict]) -> None:
+        get_supabase().table(self.table).update({
+            "status": "done",
+            "error": None,
+            "finished_at": _now().isoformat(),
+            **(fields or {}),
+        }).eq("id", job["id"]).execute()
+
+    def _fail(self, job: dict, error: Exception) -> Optional[float]:
+        """Schedule a retry (returns its delay) or give up after max_attempts."""
+        attempts = (job.get("attempts") or 0) + 1
+        table = get_supabase().table(self.table)
+        if attempts >= self.max_attempts:
+            table.update({
+                "status": "failed", "attempts": attempts, "error": str(error),
+                "finished_at": _now().isoformat(),
+            }).eq("id", job["id"]).execute()
+            return None
+        delay = self.retry_base_seconds * 2 ** (attempts - 1)
+        table.update({
+            "status": "queued", "attempts": attempts, "error": str(error),
+            "retry_at": (_now() + timedelta(seconds=delay)).isoformat(),
+        }).eq("id", job["id"]).execute()
+        return delay
+
+    # ── Workers ──────────────────────────────────────────────────────────────
+
+    def _put(self, job_id: str) -> None:
+        """Runs on the event loop."""
+        if job_id not in self._enqueued:
+            self._enqueued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _process(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self._claim, job_id)
+        if not job:
+            return   # done, claimed elsewhere, or not due yet
+        try:
+            fields = await self.run(job)
+        except asyncio.CancelledError:
+            raise    # shutdown: the row stays running and goes stale → taken over later
+        except Exception as e:
+            print(f"Job {job_id} in {self.table} failed: {e}")
+            delay = await asyncio.to_thread(self._fail, job, e)
+            if delay is not None:
+                self._retried += 1
+                self._loop.call_later(delay, self._put, job_id)
+            return
+        await asyncio.to_thread(self._finish, job, fields)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"Job {job_id} in {self.table} failed: {e}")
+            finally:
+                self._enqueued.discard(job_id)
+                self._queue.task_done()
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            try:
+                if self.sweep_hook is not None:
+                    await asyncio.to_thread(self.sweep_hook)
+                for job_id in await asyncio.to_thread(self._resumable):
+                    self._put(job_id)
+            except Exception as e:
+                print(f"Could not resume jobs in {self.table}: {e}")
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks.extend(asyncio.create_task(self._worker()) for _ in range(self.workers))
+        self._tasks.append(asyncio.create_task(self._sweep_forever()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._enqueued.clear()
+        self._loop = self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self._tasks else 0,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "retried": self._retried,
+        }
@@ -0,0 +1,58 @@
+"""
+Strict parsing of client-supplied ids and cursors.
+
+Anything that ends up inside a PostgREST filter string (or_(), in_()) is
+parsed here first: a value that isn't exactly a uuid / ISO timestamp could
+otherwise add filter clauses, or make Postgres reject the whole query.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def is_uuid(value) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def parse_uuid(value: str, field: str = "id") -> str:
+    """Canonical uuid string, or 400."""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ISO-8601 (a trailing Z is accepted) → datetime. Raises ValueError."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(created_at, id) from a cursor, both re-serialised after parsing; 400 if either is malformed."""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return parse_timestamp(created_at).isoformat(), str(uuid.UUID(row_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_before(cursor: Optional[str]) -> Optional[str]:
+    """or_() filter for rows after `cursor` in (created_at DESC, id DESC) order."""
+    if not cursor:
+        return None
+    created_at, row_id = decode_cursor(cursor)
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
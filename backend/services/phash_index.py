@@ -0,0 +1,260 @@
+"""
+Perceptual-hash index for listing photos.
+
+Every item photo gets a 64-bit difference hash (dHash) in the item's
+background verification job, from the bytes that job downloads anyway.
+Hashes are stored in `item_image_hashes` and mirrored into an in-process
+BK-tree, so "is this photo a near-copy of one we already have?" is a
+Hamming-distance search touching a handful of nodes instead of a table
+scan. Two uses:
+
+  * listings — duplicate / stolen-photo checks before a new item goes live,
+    and for the admin pending queue (each process catches up from the table
+    before a lookup)
+  * verdicts — a near-duplicate of an image that was already verified can
+    reuse that AI result instead of paying for a new call
+
+Pillow is required to compute hashes; without it every lookup finds nothing.
+"""
+
+import io
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from dependencies import get_supabase
+
+try:
+    from PIL import Image, ImageOps
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+# Max differing bits (of 64) for two photos to count as the same picture
+DUPLICATE_DISTANCE = int(os.environ.get("PHASH_DUPLICATE_DISTANCE", "6"))
+# Stricter bound for reusing someone else's verification result
+VERDICT_DISTANCE = int(os.environ.get("PHASH_VERDICT_DISTANCE", "4"))
+MAX_VERDICTS = int(os.environ.get("PHASH_MAX_VERDICTS", "20000"))
+SYNC_BATCH = 1000
+
+
+def dhash(data: bytes) -> Optional[int]:
+    """64-bit difference hash: 9x8 grayscale thumbnail, one bit per horizontal gradient."""
+    if not _PIL_AVAILABLE:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # draft() lets the JPEG decoder skip most of the work for a tiny target
+            img.draft("L", (64, 64))
+            img = ImageOps.exif_transpose(img).convert("L")
+            pixels = list(img.resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+def distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard–Keller tree over Hamming distance. Not thread-safe; callers hold a lock."""
+
+    def __init__(self):
+        self._root: Optional[list] = None   # [hash, [values], {distance: child}]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, h: int, value) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = [h, [value], {}]
+            return
+        node = self._root
+        while True:
+            d = distance(h, node[0])
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [value], {}]
+                return
+            node = child
+
+    def search(self, h: int, max_distance: int) -> List[Tuple[int, object]]:
+        """All (distance, value) pairs within max_distance of h, closest first."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = distance(h, node[0])
+            if d <= max_distance:
+                found.extend((d, value) for value in node[1])
+            # Triangle inequality: only children at |d - k| <= max_distance can match
+            for k, child in node[2].items():
+                if d - max_distance <= k <= d + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+_lock = threading.Lock()
+_listings = BKTree()                      # hash -> {"item_id", "owner_id", "image_index"}
+_hashes_by_item: Dict[str, List[int]] = {}
+_removed_items: set = set()
+_watermark: Optional[str] = None          # created_at of the newest row mirrored from the table
+
+_verdicts = BKTree()                      # hash -> {"scope", "result"}
+_verdict_log: deque = deque()             # insertion order, for rebuilding when full
+_verdict_hits = 0
+
+
+# ── Listings ─────────────────────────────────────────────────────────────────
+
+def _index_listing(item_id: str, owner_id: str, image_index: int, h: int) -> None:
+    """Caller holds _lock."""
+    if h in _hashes_by_item.get(item_id, ()):
+        return
+    _listings.add(h, {"item_id": item_id, "owner_id": owner_id, "image_index": image_index})
+    _hashes_by_item.setdefault(item_id, []).append(h)
+
+
+def sync(supabase) -> None:
+    """Mirror rows other processes have written since the last sync."""
+    global _watermark
+    while True:
+        query = (
+            supabase.table("item_image_hashes")
+            .select("item_id, owner_id, image_index, dhash, created_at")
+            .order("created_at")
+            .limit(SYNC_BATCH)
+        )
+        if _watermark:
+            # gte: rows sharing the watermark timestamp may not all be mirrored yet
+            query = query.gte("created_at", _watermark)
+        try:
+            rows = query.execute().data or []
+        except Exception as e:
+            print(f"Could not sync image hashes: {e}")
+            return
+        previous = _watermark
+        with _lock:
+            for row in rows:
+                _index_listing(row["item_id"], row["owner_id"], row["image_index"], int(row["dhash"], 16))
+                if _watermark is None or row["created_at"] > _watermark:
+                    _watermark = row["created_at"]
+        if len(rows) < SYNC_BATCH or _watermark == previous:
+            return
+
+
+def warm() -> None:
+    """Startup catch-up, run in a background thread: never raises, so it can't fail startup."""
+    try:
+        sync(get_supabase())
+    except Exception as e:
+        print(f"Could not warm the image hash index: {e}")
+
+
+def record_item(supabase, item_id: str, owner_id: str, image_urls: List[str], hashes: List[Optional[int]]) -> None:
+    """Store an item's photo hashes and add them to the in-process index."""
+    rows = [
+        {"item_id": item_id, "owner_id": owner_id, "image_index": i, "image_url": url, "dhash": to_hex(h)}
+        for i, (url, h) in enumerate(zip(image_urls, hashes)) if h is not None
+    ]
+    if not rows:
+        return
+    try:
+        supabase.table("item_image_hashes").upsert(rows, on_conflict="item_id,image_index").execute()
+    except Exception as e:
+        print(f"Could not store image hashes for {item_id}: {e}")
+    with _lock:
+        for row in rows:
+            _index_listing(item_id, owner_id, row["image_index"], int(row["dhash"], 16))
+
+
+def forget_item(item_id: str) -> None:
+    """Stop matching a deleted item (its rows go with ON DELETE CASCADE)."""
+    with _lock:
+        _removed_items.add(item_id)
+
+
+def find_duplicates(hashes: List[Optional[int]], exclude_item: Optional[str] = None,
+                    max_distance: int = DUPLICATE_DISTANCE) -> List[dict]:
+    """Other listings sharing a near-identical photo, one entry per item (closest match)."""
+    best: Dict[str, dict] = {}
+    with _lock:
+        for index, h in enumerate(hashes):
+            if h is None:
+                continue
+            for d, entry in _listings.search(h, max_distance):
+                item_id = entry["item_id"]
+                if item_id == exclude_item or item_id in _removed_items:
+                    continue
+                if item_id not in best or d < best[item_id]["distance"]:
+                    best[item_id] = {**entry, "distance": d, "matched_image_index": index}
+    return sorted(best.values(), key=lambda match: match["distance"])
+
+
+def duplicates_for_item(item_id: str, max_distance: int = DUPLICATE_DISTANCE) -> List[dict]:
+    with _lock:
+        hashes = list(_hashes_by_item.get(item_id, ()))
+    return find_duplicates(hashes, exclude_item=item_id, max_distance=max_distance)
+
+
+# ── Verdicts ─────────────────────────────────────────────────────────────────
+
+def _rebuild_verdicts() -> None:
+    """Caller holds _lock. Drop the oldest half and rebuild (BK-trees don't support removal)."""
+    global _verdicts
+    while len(_verdict_log) > MAX_VERDICTS // 2:
+        _verdict_log.popleft()
+    _verdicts = BKTree()
+    for h, value in _verdict_log:
+        _verdicts.add(h, value)
+
+
+def remember_verdict(h: Optional[int], scope: tuple, result: dict) -> None:
+    """scope = (brand, category, prompt version) — a result is only reused within the same scope."""
+    if h is None:
+        return
+    value = {"scope": scope, "result": result}
+    with _lock:
+        _verdict_log.append((h, value))
+        _verdicts.add(h, value)
+        if len(_verdicts) > MAX_VERDICTS:
+            _rebuild_verdicts()
+
+
+def similar_verdict(h: Optional[int], scope: tuple, max_distance: int = VERDICT_DISTANCE) -> Optional[dict]:
+    global _verdict_hits
+    if h is None:
+        return None
+    with _lock:
+        for _, value in _verdicts.search(h, max_distance):
+            if value["scope"] == scope:
+                _verdict_hits += 1
+                return value["result"]
+    return None
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "listing_hashes": len(_listings),
+            "items": len(_hashes_by_item),
+            "verdicts": len(_verdicts),
+            "verdict_hits": _verdict_hits,
+            "watermark": _watermark,
+        }
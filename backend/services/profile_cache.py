@@ -0,0 +1,123 @@
+"""
+Process-local read-through cache of public profile projections.
+
+Popular sellers show up in almost every feed page and inbox, so instead of
+joining `profiles` into each listing query the routers look owners up here.
+Entries expire after a TTL and the least recently used ones are evicted
+once the cache is full. Writes that change a public profile (profile edits,
+new reviews, suspensions, completed swaps) call invalidate().
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from services.profile_stats import average_rating, rating_histogram
+
+TTL_SECONDS = int(os.environ.get("PROFILE_CACHE_TTL", "300"))
+MAX_ENTRIES = int(os.environ.get("PROFILE_CACHE_SIZE", "5000"))
+# Ids per `in_` query on a miss — keeps the GET URL well under server limits
+FETCH_CHUNK = 200
+
+# Superset of the fields the feed, conversation and public profile views need
+PUBLIC_PROFILE_FIELDS = (
+    "id, full_name, username, avatar_url, location, latitude, longitude, eco_points, created_at, "
+    "items_listed, items_swapped, rating_sum, rating_count, rating_histogram"
+)
+
+# Cached for distance computations, never returned to other users
+PRIVATE_FIELDS = ("latitude", "longitude")
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, tuple]" = OrderedDict()   # user_id -> (expires_at, profile)
+_hits = 0
+_misses = 0
+_evictions = 0
+
+
+def _project(row: dict) -> dict:
+    row["items_listed"] = row.get("items_listed") or 0
+    row["items_swapped"] = row.get("items_swapped") or 0
+    row["eco_points"] = row.get("eco_points") or 0
+    row["rating"] = average_rating(row)
+    row["rating_count"] = row.get("rating_count") or 0
+    row["rating_histogram"] = rating_histogram(row)
+    return row
+
+
+def _lookup(user_id: str, now: float) -> Optional[dict]:
+    """Caller holds _lock."""
+    global _hits, _misses
+    entry = _entries.get(user_id)
+    if entry is None or entry[0] <= now:
+        _misses += 1
+        return None
+    _entries.move_to_end(user_id)
+    _hits += 1
+    return entry[1]
+
+
+def _store(profile: dict, now: float) -> None:
+    """Caller holds _lock."""
+    global _evictions
+    _entries[profile["id"]] = (now + TTL_SECONDS, profile)
+    _entries.move_to_end(profile["id"])
+    while len(_entries) > MAX_ENTRIES:
+        _entries.popitem(last=False)
+        _evictions += 1
+
+
+def get_many(supabase, user_ids: Iterable[str]) -> Dict[str, dict]:
+    """Public profiles for user_ids; misses are fetched FETCH_CHUNK ids per `in_` query."""
+    wanted = {uid for uid in user_ids if uid}
+    found: Dict[str, dict] = {}
+    now = time.monotonic()
+    with _lock:
+        for uid in wanted:
+            profile = _lookup(uid, now)
+            if profile is not None:
+                found[uid] = profile
+
+    missing = list(wanted - found.keys())
+    for i in range(0, len(missing), FETCH_CHUNK):
+        resp = supabase.table("profiles").select(PUBLIC_PROFILE_FIELDS).in_("id", missing[i:i + FETCH_CHUNK]).execute()
+        now = time.monotonic()
+        with _lock:
+            for row in resp.data or []:
+                profile = _project(row)
+                _store(profile, now)
+                found[profile["id"]] = profile
+
+    # Hand out copies so callers can't mutate cached entries
+    return {uid: dict(profile) for uid, profile in found.items()}
+
+
+def get(supabase, user_id: str) -> Optional[dict]:
+    return get_many(supabase, [user_id]).get(user_id)
+
+
+def public(profile: dict) -> dict:
+    """A profile as other users may see it: without PRIVATE_FIELDS."""
+    return {k: v for k, v in profile.items() if k not in PRIVATE_FIELDS}
+
+
+def invalidate(*user_ids: str) -> None:
+    with _lock:
+        for uid in user_ids:
+            _entries.pop(uid, None)
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            "size": len(_entries),
+            "max_entries": MAX_ENTRIES,
+            "ttl_seconds": TTL_SECONDS,
+            "hits": _hits,
+            "misses": _misses,
+            "evictions": _evictions,
+            "hit_rate": round(_hits / lookups, 3) if lookups else 0.0,
+        }
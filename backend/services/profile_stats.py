@@ -0,0 +1,56 @@
+"""
+Helpers for the trigger-maintained profile aggregates.
+
+items_listed / items_swapped / wishlist_count / rating_sum / rating_count /
+rating_histogram are kept up to date on `profiles` by triggers on items, wishlists and reviews
+(DB/migration_profile_stats.sql), so a profile read is a single-row fetch.
+A periodic reconciliation job recomputes them from the source tables to
+catch any drift; an advisory lock (DB/migration_reconcile_lock.sql) makes
+sure only one process runs it at a time.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from dependencies import get_supabase
+
+RECONCILE_INTERVAL_SECONDS = int(os.environ.get("PROFILE_STATS_RECONCILE_INTERVAL", "3600"))
+
+
+def average_rating(profile: dict) -> float:
+    count = profile.get("rating_count") or 0
+    if not count:
+        return 0.0
+    return round((profile.get("rating_sum") or 0) / count, 1)
+
+
+def rating_histogram(profile: dict) -> dict:
+    """{"1": n, …, "5": n} from the rating_histogram array column."""
+    hist = list(profile.get("rating_histogram") or [])
+    hist += [0] * (5 - len(hist))
+    return {str(star): hist[star - 1] or 0 for star in range(1, 6)}
+
+
+def reconcile() -> Optional[int]:
+    """Recompute every profile's aggregates; returns how many rows had drifted.
+
+    None if another process is reconciling right now.
+    """
+    resp = get_supabase().rpc("reconcile_profile_stats_exclusive", {}).execute()
+    fixed = resp.data or 0
+    return None if fixed < 0 else fixed
+
+
+async def reconcile_forever(interval: int = RECONCILE_INTERVAL_SECONDS):
+    """Background loop started by main.py; interval <= 0 disables it."""
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await asyncio.to_thread(reconcile)
+            if fixed:
+                print(f"Profile stats reconciliation corrected {fixed} profiles")
+        except Exception as e:
+            print(f"Profile stats reconciliation failed: {e}")
@@ -0,0 +1,149 @@
+"""
+Rate limiting for abuse-prone endpoints (password reset, verification email).
+
+Sliding-window counters: each key keeps the count for the current and the
+previous fixed window, and the previous one is weighted by how much of it
+still overlaps the sliding window. O(1) memory per key, no timestamp lists.
+
+Checks run in memory before any database or auth call, so a burst of
+abusive requests costs a dict lookup each. Counters are per process; set
+RATE_LIMIT_REDIS_URL (and install `redis`) to share them between workers —
+each check is then one pipelined round trip to Redis, and denied attempts
+are counted too.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL")
+MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+# Only honour X-Forwarded-For behind a proxy you control
+TRUST_PROXY_HEADERS = os.environ.get("TRUST_PROXY_HEADERS", "0") == "1"
+
+# rule -> {scope: (max requests, window seconds)}
+RULES: Dict[str, Dict[str, Tuple[int, int]]] = {
+    "password_reset": {
+        "email": (int(os.environ.get("RATE_LIMIT_RESET_PER_EMAIL", "5")), 3600),
+        "ip": (int(os.environ.get("RATE_LIMIT_RESET_PER_IP", "20")), 3600),
+    },
+    "verification_email": {
+        "email": (int(os.environ.get("RATE_LIMIT_VERIFY_PER_EMAIL", "3")), 600),
+        "ip": (int(os.environ.get("RATE_LIMIT_VERIFY_PER_IP", "20")), 3600),
+    },
+}
+
+_lock = threading.Lock()
+_windows: "OrderedDict[str, list]" = OrderedDict()   # key -> [window index, current count, previous count]
+_denied = 0
+_redis = None
+
+
+def client_ip(request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _estimate(previous: int, current: int, elapsed: float, window: int) -> float:
+    return previous * (1 - elapsed / window) + current
+
+
+def _retry_after(previous: int, current: int, elapsed: float, window: int, limit: int) -> int:
+    """Seconds until one more request fits under the limit."""
+    if current + 1 > limit:
+        # The current window is full: wait for it to become the previous one
+        # and slide out far enough
+        needed = (window - elapsed) + window * (1 - (limit - 1) / max(current, 1))
+    else:
+        # Wait for enough of the previous window to slide out
+        needed = window * (1 - (limit - 1 - current) / previous) - elapsed
+    return max(math.ceil(needed), 1)
+
+
+def _slot(key: str, index: int) -> list:
+    """Caller holds _lock. Counters for key, rolled forward to window `index`."""
+    slot = _windows.get(key)
+    if slot is None:
+        slot = _windows[key] = [index, 0, 0]
+    elif slot[0] != index:
+        slot[2] = slot[1] if slot[0] == index - 1 else 0
+        slot[1] = 0
+        slot[0] = index
+    _windows.move_to_end(key)
+    while len(_windows) > MAX_KEYS:
+        _windows.popitem(last=False)
+    return slot
+
+
+def _check_memory(checks, now: float) -> Optional[int]:
+    with _lock:
+        state = []
+        for key, limit, window in checks:
+            index, elapsed = divmod(now, window)
+            slot = _slot(key, int(index))
+            if _estimate(slot[2], slot[1], elapsed, window) + 1 > limit:
+                return _retry_after(slot[2], slot[1], elapsed, window, limit)
+            state.append(slot)
+        # Only allowed requests count, and only once every key has room
+        for slot in state:
+            slot[1] += 1
+    return None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(REDIS_URL)
+    return _redis
+
+
+def _check_redis(checks, now: float) -> Optional[int]:
+    pipe = _get_redis().pipeline()
+    positions = []
+    for key, limit, window in checks:
+        index, elapsed = divmod(now, window)
+        current_key = f"rl:{key}:{int(index)}"
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(f"rl:{key}:{int(index) - 1}")
+        positions.append((limit, window, elapsed))
+    results = pipe.execute()
+    for i, (limit, window, elapsed) in enumerate(positions):
+        current, previous = int(results[i * 3]), int(results[i * 3 + 2] or 0)
+        # INCR already counted this request
+        if _estimate(previous, current, elapsed, window) > limit:
+            return _retry_after(previous, current - 1, elapsed, window, limit)
+    return None
+
+
+def check(rule: str, **keys: str) -> Optional[int]:
+    """None if the request may proceed, else seconds to wait. keys: scope=value, e.g. email=…, ip=…"""
+    global _denied
+    checks = [
+        (f"{rule}:{scope}:{value.strip().lower()}", *RULES[rule][scope])
+        for scope, value in keys.items() if value
+    ]
+    now = time.time()
+    if REDIS_URL:
+        try:
+            retry_after = _check_redis(checks, now)
+        except Exception as e:
+            print(f"Rate limit store unavailable, using local counters: {e}")
+            retry_after = _check_memory(checks, now)
+    else:
+        retry_after = _check_memory(checks, now)
+    if retry_after is not None:
+        _denied += 1
+    return retry_after
+
+
+def stats() -> dict:
+    with _lock:
+        return {"keys": len(_windows), "denied": _denied, "shared": bool(REDIS_URL)}
@@ -0,0 +1,88 @@
+"""
+Per-user unread counters kept in process memory.
+
+Backs GET /conversations/unread-summary so badge polling is a dict read
+instead of the fully enriched conversation list. Entries are loaded from
+`conversations` on first use and then adjusted in place by the chat
+endpoints; a short TTL re-reads the table so counters changed by other
+workers or DB triggers converge. The least recently used users are evicted
+once MAX_ENTRIES are cached, so memory stays bounded however many users a
+long-lived process sees.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+TTL_SECONDS = 60
+MAX_ENTRIES = int(os.environ.get("UNREAD_CACHE_SIZE", "10000"))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, _UserUnread]" = OrderedDict()
+
+
+class _UserUnread:
+    __slots__ = ("loaded_at", "counts", "total")
+
+    def __init__(self, counts: Dict[str, int]):
+        self.loaded_at = time.monotonic()
+        self.counts = counts
+        self.total = sum(counts.values())
+
+
+def _load(supabase, user_id: str) -> Dict[str, int]:
+    resp = (
+        supabase.table("conversations")
+        .select("id, user1_id, unread_user1, unread_user2")
+        .or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}")
+        .execute()
+    )
+    counts = {}
+    for conv in resp.data or []:
+        field = "unread_user1" if conv["user1_id"] == user_id else "unread_user2"
+        counts[conv["id"]] = conv.get(field) or 0
+    return counts
+
+
+def get_summary(supabase, user_id: str) -> dict:
+    """Total + per-conversation unread counts, loading from the DB only on a miss."""
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and time.monotonic() - entry.loaded_at < TTL_SECONDS:
+            _entries.move_to_end(user_id)
+            return {"total": entry.total, "conversations": {k: v for k, v in entry.counts.items() if v}}
+
+    entry = _UserUnread(_load(supabase, user_id))
+    with _lock:
+        _entries[user_id] = entry
+        _entries.move_to_end(user_id)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+        return {"total": entry.total, "conversations": {k: v for k, v in entry.counts.items() if v}}
+
+
+def increment(user_id: str, conv_id: str, by: int = 1) -> None:
+    """A message landed in conv_id for user_id. No-op if the user isn't cached yet."""
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return
+        entry.counts[conv_id] = entry.counts.get(conv_id, 0) + by
+        entry.total += by
+
+
+def reset(user_id: str, conv_id: str) -> None:
+    """user_id has read everything in conv_id."""
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return
+        entry.total -= entry.counts.pop(conv_id, 0)
+
+
+def forget_conversation(user_ids: Iterable[str], conv_id: str) -> None:
+    """conv_id was deleted — drop it from every participant's counters."""
+    for user_id in user_ids:
+        reset(user_id, conv_id)
@@ -0,0 +1,149 @@
+"""
+Content-addressed cache for AI authenticity verification results.
+
+Results are keyed by SHA-256 over the image bytes + brand + category +
+prompt version, so retried uploads and re-verifications of the same photo
+cost nothing. The in-memory layer is a size-bounded LRU; setting
+VERIFY_CACHE_PATH additionally persists entries to a local SQLite file so
+they survive restarts; async callers (aget/aput) do that disk I/O in a
+worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+MAX_ENTRIES = int(os.environ.get("VERIFY_CACHE_SIZE", "2048"))
+CACHE_PATH = os.environ.get("VERIFY_CACHE_PATH")   # e.g. /var/cache/swapstyl/verify.sqlite3
+
+_lock = threading.Lock()      # memory tier + counters; never held during disk I/O
+_db_lock = threading.Lock()   # the SQLite connection
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+_hits = 0
+_misses = 0
+_db: Optional[sqlite3.Connection] = None
+
+
+def cache_key(image_bytes: bytes, brand: str, category: Optional[str], prompt_version: str) -> str:
+    h = hashlib.sha256()
+    h.update(image_bytes)
+    # Length-prefix the text parts so ("ab", "c") and ("a", "bc") can't collide
+    for part in (brand or "", category or "", prompt_version):
+        encoded = part.strip().lower().encode("utf-8")
+        h.update(len(encoded).to_bytes(4, "big"))
+        h.update(encoded)
+    return h.hexdigest()
+
+
+def _get_db() -> Optional[sqlite3.Connection]:
+    """Caller holds _db_lock."""
+    global _db
+    if _db is None and CACHE_PATH:
+        _db = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS verification_results "
+            "(key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        _db.commit()
+    return _db
+
+
+def _remember(key: str, result: dict) -> None:
+    """Caller holds _lock."""
+    _entries[key] = result
+    _entries.move_to_end(key)
+    while len(_entries) > MAX_ENTRIES:
+        _entries.popitem(last=False)
+
+
+def _get_memory(key: str) -> Optional[dict]:
+    with _lock:
+        result = _entries.get(key)
+        if result is not None:
+            _entries.move_to_end(key)
+        return result
+
+
+def _get_disk(key: str) -> Optional[dict]:
+    """Blocking (SQLite read)."""
+    with _db_lock:
+        db = _get_db()
+        row = db.execute("SELECT result FROM verification_results WHERE key = ?", (key,)).fetchone() if db else None
+    if not row:
+        return None
+    result = json.loads(row[0])
+    with _lock:
+        _remember(key, result)
+    return result
+
+
+def _put_disk(key: str, result: dict) -> None:
+    """Blocking (SQLite write + commit)."""
+    with _db_lock:
+        db = _get_db()
+        if db is not None:
+            db.execute(
+                "INSERT OR REPLACE INTO verification_results (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time()),
+            )
+            db.commit()
+
+
+def _count(result: Optional[dict]) -> Optional[dict]:
+    global _hits, _misses
+    with _lock:
+        if result is None:
+            _misses += 1
+            return None
+        _hits += 1
+    return dict(result)
+
+
+def get(key: str) -> Optional[dict]:
+    """Blocking when the disk tier is enabled; async code uses aget()."""
+    result = _get_memory(key)
+    if result is None and CACHE_PATH:
+        result = _get_disk(key)
+    return _count(result)
+
+
+def put(key: str, result: dict) -> None:
+    """Blocking when the disk tier is enabled; async code uses aput()."""
+    with _lock:
+        _remember(key, dict(result))
+    if CACHE_PATH:
+        _put_disk(key, result)
+
+
+async def aget(key: str) -> Optional[dict]:
+    """Memory hits return inline; the SQLite lookup runs in a worker thread."""
+    result = _get_memory(key)
+    if result is None and CACHE_PATH:
+        result = await asyncio.to_thread(_get_disk, key)
+    return _count(result)
+
+
+async def aput(key: str, result: dict) -> None:
+    with _lock:
+        _remember(key, dict(result))
+    if CACHE_PATH:
+        await asyncio.to_thread(_put_disk, key, result)
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            "size": len(_entries),
+            "max_entries": MAX_ENTRIES,
+            "persistent": bool(CACHE_PATH),
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / lookups, 3) if lookups else 0.0,
+        }
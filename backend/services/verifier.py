@@ -0,0 +1,228 @@
+"""
+Async AI authenticity verification engine.
+
+Scoring is delegated to the backend selected by VERIFY_BACKEND (see
+services/verify_backends.py); the OpenAI backend uses the async client, so
+in-flight verifications don't hold threads from the default executor that
+the sync routers run on. Calls go through a semaphore-bounded limiter
+(VERIFY_MAX_CONCURRENCY). Waiters are woken in FIFO order, so bursts queue
+fairly. Each verification has a total time budget (VERIFY_TIMEOUT_SECONDS)
+covering queueing, the call and any 429 backoff.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from services import verification_cache, image_prep, phash_index, verify_backends
+
+MAX_CONCURRENCY = int(os.environ.get("VERIFY_MAX_CONCURRENCY", "8"))
+TIMEOUT_SECONDS = float(os.environ.get("VERIFY_TIMEOUT_SECONDS", "45"))
+
+# Multi-image verification: "single" (preferred photo only) or "all" (score fusion)
+VERIFY_MODES = ("single", "all")
+DEFAULT_MODE = os.environ.get("VERIFY_MODE", "single")
+MAX_IMAGES = 6
+BRAND_TAG_WEIGHT = 2.0
+
+_http_client: Optional[httpx.AsyncClient] = None
+_limiter = asyncio.Semaphore(MAX_CONCURRENCY)
+_in_flight = 0
+_waiting = 0
+
+
+def is_configured() -> bool:
+    return verify_backends.get_backend().is_configured()
+
+
+async def _score_limited(image_bytes: bytes, mime_type: str, brand: str, category: Optional[str], deadline: float) -> dict:
+    global _in_flight, _waiting
+    _waiting += 1
+    try:
+        await _limiter.acquire()
+    finally:
+        _waiting -= 1
+    _in_flight += 1
+    try:
+        return await verify_backends.get_backend().score(image_bytes, mime_type, brand, category, deadline)
+    finally:
+        _in_flight -= 1
+        _limiter.release()
+
+
+async def verify_image(image_bytes: bytes, mime_type: str, brand: str, category: Optional[str] = None) -> dict:
+    """Verification result for one image, served from the content-addressed cache when possible."""
+    backend = verify_backends.get_backend()
+    key = verification_cache.cache_key(image_bytes, brand, category, backend.version)
+    cached = await verification_cache.aget(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    # Near-duplicate of a photo we already scored (re-encoded, resized, recropped slightly)
+    scope = (brand.strip().lower(), (category or "").strip().lower(), backend.version)
+    perceptual = await asyncio.to_thread(phash_index.dhash, image_bytes)
+    similar = phash_index.similar_verdict(perceptual, scope)
+    if similar is not None:
+        return {**similar, "cached": True, "near_duplicate": True}
+
+    unavailable = backend.unavailable_reason()
+    if unavailable:
+        return {"confidence": 0, "reason": unavailable, "error": True, "cached": False}
+
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    # Decoding/resizing is CPU-bound — keep it off the event loop
+    image_bytes, mime_type = await asyncio.to_thread(image_prep.prepare_for_model, image_bytes, mime_type)
+    try:
+        result = await asyncio.wait_for(
+            _score_limited(image_bytes, mime_type, brand, category, deadline),
+            timeout=TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        result = {"confidence": 0, "reason": "AI verification timed out", "error": True}
+
+    # Transient failures (timeouts, rate limits, unparsable output) must be retried, not cached
+    if not result.get("error"):
+        await verification_cache.aput(key, result)
+        phash_index.remember_verdict(perceptual, scope, result)
+    return {**result, "cached": False}
+
+
+def preferred_image_url(image_urls: List[str]) -> str:
+    """Brand-tag photo (slot index 1) if present, else the first photo."""
+    return image_urls[1] if len(image_urls) > 1 else image_urls[0]
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """One pooled client for all image downloads (connections are reused across requests)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=20, limits=httpx.Limits(max_connections=MAX_CONCURRENCY * 4))
+    return _http_client
+
+
+async def close() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def fetch_images(urls: List[str]) -> Dict[str, Tuple[bytes, str]]:
+    """Download photos concurrently on the pooled client: {url: (bytes, mime)}, failed downloads left out."""
+    results = await asyncio.gather(
+        *(image_prep.fetch_image(_get_http_client(), url) for url in urls), return_exceptions=True,
+    )
+    return {url: result for url, result in zip(urls, results) if not isinstance(result, BaseException)}
+
+
+async def _fetch_and_verify(url: str, brand: str, category: Optional[str],
+                            prefetched: Optional[Dict[str, Tuple[bytes, str]]] = None) -> dict:
+    if prefetched and url in prefetched:
+        image_bytes, mime_type = prefetched[url]
+    else:
+        image_bytes, mime_type = await image_prep.fetch_image(_get_http_client(), url)
+    return await verify_image(image_bytes, mime_type, brand, category)
+
+
+def _image_weight(index: int) -> float:
+    # The brand-tag photo (slot 1) carries the most authenticity signal
+    return BRAND_TAG_WEIGHT if index == 1 else 1.0
+
+
+def _decision_settled(done: List[tuple], pending_weight: float, threshold: float) -> bool:
+    """True once no outcome for the pending images can move the fused score across threshold."""
+    scored_weight = sum(w for w, _ in done)
+    total = scored_weight + pending_weight
+    if not total:
+        return False
+    weighted = sum(w * r["confidence"] for w, r in done)
+    lowest = weighted / total                         # every pending image scores 0
+    highest = (weighted + 100 * pending_weight) / total  # every pending image scores 100
+    return lowest >= threshold or highest < threshold
+
+
+async def _verify_all(image_urls: List[str], brand: str, category: Optional[str], threshold: Optional[float],
+                      prefetched: Optional[Dict[str, Tuple[bytes, str]]] = None) -> dict:
+    """Score every listing image concurrently and fuse the scores (weighted mean).
+
+    Images that fail to download or score are left out of the fusion. With a
+    threshold, remaining work is cancelled as soon as the decision is settled.
+    """
+    urls = image_urls[:MAX_IMAGES]
+    tasks = {
+        asyncio.create_task(_fetch_and_verify(url, brand, category, prefetched)): (index, url)
+        for index, url in enumerate(urls)
+    }
+    pending_weight = sum(_image_weight(i) for i, _ in tasks.values())
+    done: List[tuple] = []
+    per_image = []
+    first_error: Optional[Exception] = None
+    early_exit = False
+
+    try:
+        remaining = set(tasks)
+        while remaining:
+            finished, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                index, url = tasks[task]
+                weight = _image_weight(index)
+                pending_weight -= weight
+                if task.exception() is not None:
+                    first_error = first_error or task.exception()
+                    per_image.append({"index": index, "url": url, "error": True})
+                    continue
+                outcome = task.result()
+                per_image.append({"index": index, "url": url, **outcome})
+                if not outcome.get("error"):
+                    done.append((weight, outcome))
+
+            if threshold is not None and remaining and done and _decision_settled(done, pending_weight, threshold):
+                early_exit = True
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if not done:
+        if first_error is not None:
+            raise first_error
+        return {"confidence": 0, "reason": "No image could be verified", "error": True, "cached": False}
+
+    total = sum(w for w, _ in done)
+    fused = round(sum(w * r["confidence"] for w, r in done) / total)
+    # Explain with the most informative image that was actually scored
+    lead = max(done, key=lambda wr: wr[0])[1]
+    return {
+        "confidence": fused,
+        "reason": lead.get("reason", ""),
+        "cached": all(r.get("cached") for _, r in done),
+        "early_exit": early_exit,
+        "images": sorted(per_image, key=lambda r: r["index"]),
+    }
+
+
+async def verify_listing(image_urls: List[str], brand: str, category: Optional[str] = None,
+                         mode: Optional[str] = None, threshold: Optional[float] = None,
+                         prefetched: Optional[Dict[str, Tuple[bytes, str]]] = None) -> dict:
+    """Verify a listing's photos.
+
+    mode "single" scores only the preferred photo; mode "all" scores every photo
+    concurrently and fuses the scores. Photos in `prefetched` (from
+    fetch_images) are not downloaded again. Raises image_prep.ImageTooLarge /
+    httpx errors if no image can be fetched.
+    """
+    if (mode or DEFAULT_MODE) == "all" and len(image_urls) > 1:
+        return await _verify_all(image_urls, brand, category, threshold, prefetched)
+    return await _fetch_and_verify(preferred_image_url(image_urls), brand, category, prefetched)
+
+
+def stats() -> dict:
+    return {
+        "backend": verify_backends.get_backend().name,
+        "max_concurrency": MAX_CONCURRENCY,
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+    }
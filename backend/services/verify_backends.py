@@ -0,0 +1,259 @@
+"""
+Interchangeable scoring backends for AI verification.
+
+The verifier (cache, limiter, time budget, fusion) is backend-agnostic; only
+the call that turns one prepared image into {"confidence", "reason"} lives
+here. VERIFY_BACKEND selects:
+
+  openai  — gpt-4o-mini vision (default). With VERIFY_RECORD_PATH set, every
+            response is appended to a JSONL file the replay backend can serve.
+  stub    — deterministic local model: latency and score are drawn from
+            configurable distributions seeded by the image bytes, so the same
+            image always gets the same answer. No network, no cost.
+  replay  — serves responses recorded by the openai backend, keyed by the
+            SHA-256 of the prepared image bytes.
+
+Each backend has a `version` that goes into verification cache keys, so
+stub or replayed results are never served as real ones.
+"""
+
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+# The SDK takes ~0.5s to import, so it is only imported once a request needs it
+_SDK_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+
+def build_prompt(brand: str, category: Optional[str] = None) -> str:
+    cat_str = f" ({category})" if category else ""
+    return (
+        f'You are a fashion authentication expert. '
+        f'Examine this item image{cat_str}. '
+        f'Does it show a genuine item from the brand "{brand}"? '
+        f'Check for correct features, brand labels, logos, tags, and stitching quality typical for {category or "this type of product"}. '
+        f'Reply ONLY with JSON (no markdown): {{"confidence": <0-100 integer>, "reason": "<one sentence>"}}'
+    )
+
+
+def parse_response(text: str) -> dict:
+    text = text.strip()
+    # Strip markdown code fences if present
+    text = re.sub(r'^```json\s*|\s*```$', '', text, flags=re.DOTALL).strip()
+    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+    if json_match:
+        try:
+            parsed = json.loads(json_match.group())
+            return {
+                "confidence": int(parsed.get("confidence", 0)),
+                "reason": parsed.get("reason", ""),
+            }
+        except (ValueError, TypeError):
+            pass
+    return {"confidence": 0, "reason": "Failed to parse OpenAI response", "error": True}
+
+
+def image_key(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OpenAIBackend:
+    name = "openai"
+    model = "gpt-4o-mini"
+    # Bump whenever the prompt or model changes so cached results are not reused
+    version = f"{model}/v1"
+    max_retries = 4
+
+    def __init__(self, api_key: Optional[str] = None, record_path: Optional[str] = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.record_path = record_path or os.environ.get("VERIFY_RECORD_PATH")
+        self._client = None
+        self._record_lock = threading.Lock()
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def unavailable_reason(self) -> Optional[str]:
+        return None if _SDK_AVAILABLE else "openai SDK not installed"
+
+    def _get_client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    @staticmethod
+    def _retry_after(error, attempt: int) -> float:
+        """Seconds to wait before retrying a 429: honour Retry-After, else exponential backoff with jitter."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return min(0.5 * 2 ** attempt, 8.0) * (0.5 + random.random())
+
+    def _record(self, image_bytes: bytes, brand: str, category: Optional[str], result: dict, latency: float) -> None:
+        line = json.dumps({
+            "key": image_key(image_bytes),
+            "brand": brand,
+            "category": category,
+            "latency_ms": round(latency * 1000),
+            **result,
+        })
+        with self._record_lock, open(self.record_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def score(self, image_bytes: bytes, mime_type: str, brand: str, category: Optional[str], deadline: float) -> dict:
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": build_prompt(brand, category)},
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}},
+                ],
+            }
+        ]
+
+        import openai
+        started = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._get_client().chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=300,
+                    timeout=max(deadline - time.monotonic(), 1.0),
+                )
+                result = parse_response(response.choices[0].message.content or "")
+                if self.record_path and not result.get("error"):
+                    await asyncio.to_thread(self._record, image_bytes, brand, category, result, time.monotonic() - started)
+                return result
+            except openai.RateLimitError as e:
+                delay = self._retry_after(e, attempt)
+                if attempt == self.max_retries or time.monotonic() + delay >= deadline:
+                    return {"confidence": 0, "reason": "AI rate limited, please retry shortly", "error": True}
+                await asyncio.sleep(delay)
+            except Exception as e:
+                return {"confidence": 0, "reason": f"AI error: {str(e)}", "error": True}
+
+        return {"confidence": 0, "reason": "AI rate limited, please retry shortly", "error": True}
+
+
+class StubBackend:
+    """Deterministic local model for load tests and profiling.
+
+    Latency ~ Normal(latency_ms, latency_jitter_ms), score ~ Normal(score_mean,
+    score_stddev) clamped to 0..100, and a fraction error_rate of images fail
+    with a transient error — all seeded by the image bytes (and seed).
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = None, latency_jitter_ms: float = None, score_mean: float = None,
+                 score_stddev: float = None, error_rate: float = None, seed: int = None):
+        env = os.environ.get
+        self.latency_ms = float(env("VERIFY_STUB_LATENCY_MS", "800") if latency_ms is None else latency_ms)
+        self.latency_jitter_ms = float(env("VERIFY_STUB_LATENCY_JITTER_MS", "300") if latency_jitter_ms is None else latency_jitter_ms)
+        self.score_mean = float(env("VERIFY_STUB_SCORE_MEAN", "80") if score_mean is None else score_mean)
+        self.score_stddev = float(env("VERIFY_STUB_SCORE_STDDEV", "15") if score_stddev is None else score_stddev)
+        self.error_rate = float(env("VERIFY_STUB_ERROR_RATE", "0") if error_rate is None else error_rate)
+        self.seed = int(env("VERIFY_STUB_SEED", "0") if seed is None else seed)
+        self.version = f"stub/{self.seed}"
+
+    def is_configured(self) -> bool:
+        return True
+
+    def unavailable_reason(self) -> Optional[str]:
+        return None
+
+    def _draw(self, image_bytes: bytes, brand: str) -> tuple:
+        rng = random.Random(f"{self.seed}:{image_key(image_bytes)}:{brand.strip().lower()}")
+        latency = max(rng.gauss(self.latency_ms, self.latency_jitter_ms), 0) / 1000
+        confidence = int(min(max(round(rng.gauss(self.score_mean, self.score_stddev)), 0), 100))
+        failed = rng.random() < self.error_rate
+        return latency, confidence, failed
+
+    async def score(self, image_bytes: bytes, mime_type: str, brand: str, category: Optional[str], deadline: float) -> dict:
+        latency, confidence, failed = self._draw(image_bytes, brand)
+        remaining = deadline - time.monotonic()
+        if latency > remaining:
+            await asyncio.sleep(max(remaining, 0))
+            return {"confidence": 0, "reason": "AI verification timed out", "error": True}
+        await asyncio.sleep(latency)
+        if failed:
+            return {"confidence": 0, "reason": "Stub backend: simulated transient error", "error": True}
+        return {"confidence": confidence, "reason": f"Stub backend score for {brand}"}
+
+
+class ReplayBackend:
+    """Serves responses recorded by OpenAIBackend (VERIFY_RECORD_PATH), replaying their latency."""
+
+    name = "replay"
+
+    def __init__(self, path: Optional[str] = None, replay_latency: bool = None):
+        self.path = path or os.environ.get("VERIFY_REPLAY_PATH")
+        if replay_latency is None:
+            replay_latency = os.environ.get("VERIFY_REPLAY_LATENCY", "1") == "1"
+        self.replay_latency = replay_latency
+        self.version = f"replay/{os.path.basename(self.path or '')}"
+        self._responses: Dict[tuple, dict] = {}
+        self._misses = 0
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                # Last recording for an image wins
+                self._responses[(record["key"], (record.get("brand") or "").strip().lower())] = record
+
+    def is_configured(self) -> bool:
+        return bool(self._responses)
+
+    def unavailable_reason(self) -> Optional[str]:
+        return None if self._responses else f"No recorded responses at {self.path!r}"
+
+    async def score(self, image_bytes: bytes, mime_type: str, brand: str, category: Optional[str], deadline: float) -> dict:
+        record = self._responses.get((image_key(image_bytes), brand.strip().lower()))
+        if record is None:
+            self._misses += 1
+            return {"confidence": 0, "reason": "No recorded response for this image", "error": True}
+        if self.replay_latency:
+            await asyncio.sleep(min(record.get("latency_ms", 0) / 1000, max(deadline - time.monotonic(), 0)))
+        return {"confidence": record["confidence"], "reason": record.get("reason", "")}
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    StubBackend.name: StubBackend,
+    ReplayBackend.name: ReplayBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = os.environ.get("VERIFY_BACKEND", OpenAIBackend.name)
+        if name not in BACKENDS:
+            raise ValueError(f"VERIFY_BACKEND must be one of {', '.join(BACKENDS)}")
+        _backend = BACKENDS[name]()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Swap the active backend (benchmarks, scripts)."""
+    global _backend
+    _backend = backend
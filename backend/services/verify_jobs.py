@@ -0,0 +1,192 @@
+"""
+Background AI verification jobs.
+
+Submitting a job writes a `verification_jobs` row and returns immediately.
+A pool of asyncio workers in each API process (services/job_runner.py)
+claims it, runs the verifier, stores the result and, for item jobs, updates
+the item's status. Clients poll GET /verify/jobs/{id}. Failed runs (images
+unreachable, verifier down) are retried with backoff; jobs whose worker
+died (claimed more than STALE_AFTER_SECONDS ago) are taken over, and
+listings whose job could not be created are given one by the sweep.
+
+Item jobs also gate publication on the duplicate-photo check: the photos
+are downloaded once, hashed into phash_index and, if another user's
+listing already uses them, the item is held for manual review without an
+AI call. Otherwise the same bytes are handed to the verifier.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dependencies import get_supabase
+from services import admin_stats, phash_index, verifier
+from services.job_runner import JobRunner
+
+WORKERS = int(os.environ.get("VERIFY_JOB_WORKERS", "4"))
+# A job still running this long after it was claimed lost its worker (crash,
+# redeploy) and may be taken over. Well above the slowest job: downloads plus
+# the verifier's time budget.
+STALE_AFTER_SECONDS = int(os.environ.get("VERIFY_JOB_STALE_AFTER", "180"))
+
+# Items go live automatically at this confidence (matches create_item)
+ITEM_THRESHOLD = 85
+# Stand-alone checks (upload preview) use the /verify/item threshold
+PREVIEW_THRESHOLD = 75
+# A job's verdict never overrides a moderator: held or rejected items stay as they are
+HELD_MODERATION_STATUSES = ("pending_review", "rejected")
+# Item states a finishing job may still change (not deleted, swapped, …)
+UPDATABLE_ITEM_STATUSES = ("pending_review", "available")
+# Listings created in this window without a job (create_item could not queue
+# one) get theirs from the sweep; the lower bound leaves create_item time to
+# submit before the sweep would race it.
+ORPHAN_MIN_AGE_SECONDS = 60
+ORPHAN_MAX_AGE_SECONDS = 3600
+
+
+def submit(owner_id: str, brand: str, category: Optional[str], image_urls: List[str],
+           item_id: Optional[str] = None, mode: Optional[str] = None, ai_score: Optional[float] = None) -> dict:
+    """Record a job and hand it to the worker pool. Safe to call from sync routes (threadpool).
+
+    ai_score: a score the client already obtained (upload preview) — the job
+    then only runs the photo check and skips the AI call.
+    """
+    threshold = ITEM_THRESHOLD if item_id else PREVIEW_THRESHOLD
+    return _runner.submit({
+        "owner_id": owner_id,
+        "item_id": item_id,
+        "request": {
+            "brand": brand,
+            "category": category,
+            "image_urls": image_urls,
+            "threshold": threshold,
+            "mode": mode,
+            "check_photos": item_id is not None,
+            "ai_score": ai_score,
+        },
+    })
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    return _runner.get(job_id)
+
+
+def _submit_orphans() -> None:
+    """Queue jobs for recent pending_review listings with photos but no verification job. Blocking."""
+    now = datetime.now(timezone.utc)
+    held = ",".join(HELD_MODERATION_STATUSES)
+    resp = (
+        get_supabase().table("items")
+        .select("id, owner_id, brand, category, images, verification_jobs(id)")
+        .eq("status", "pending_review")
+        .or_(f"moderation_status.is.null,moderation_status.not.in.({held})")
+        .neq("images", "{}")
+        .gte("created_at", (now - timedelta(seconds=ORPHAN_MAX_AGE_SECONDS)).isoformat())
+        .lt("created_at", (now - timedelta(seconds=ORPHAN_MIN_AGE_SECONDS)).isoformat())
+        .is_("verification_jobs", "null")
+        .execute()
+    )
+    for item in resp.data or []:
+        if item.get("images"):
+            submit(item["owner_id"], item.get("brand", ""), item.get("category"), item["images"], item_id=item["id"])
+
+
+def _apply_to_item(job: dict, result: dict) -> None:
+    # Conditional update: the item may have been held, rejected or deleted while the job ran
+    held = ",".join(HELD_MODERATION_STATUSES)
+    get_supabase().table("items").update({
+        "ai_score": result["ai_score"],
+        "ai_verified": result["verified"],
+        "status": result["status"],
+    }).eq("id", job["item_id"]).in_("status", list(UPDATABLE_ITEM_STATUSES)).or_(
+        f"moderation_status.is.null,moderation_status.not.in.({held})"
+    ).execute()
+
+
+def _check_photos(job: dict, prefetched: Dict[str, Tuple[bytes, str]]) -> List[dict]:
+    """Hash the item's photos, record them, and return listings that use them. Blocking.
+
+    Matches are flagged same_owner: reposting your own photos is not grounds
+    for a hold, but moderators still see it in the job result.
+    """
+    urls = job["request"]["image_urls"]
+    hashes = [phash_index.dhash(prefetched[url][0]) if url in prefetched else None for url in urls]
+    supabase = get_supabase()
+    phash_index.sync(supabase)
+    duplicates = phash_index.find_duplicates(hashes, exclude_item=job["item_id"])
+    phash_index.record_item(supabase, job["item_id"], job["owner_id"], urls, hashes)
+    return [{**d, "same_owner": d["owner_id"] == job["owner_id"]} for d in duplicates]
+
+
+def _hold(job: dict, duplicates: List[dict]) -> dict:
+    """Photos already used by someone else's listing: a moderator decides, no AI call."""
+    result = {
+        "ai_score": 0,
+        "verified": False,
+        "status": "pending_review",
+        "reason": "Photos match another user's listing — held for manual review",
+        "cached": False,
+        "duplicates": duplicates,
+    }
+    resp = get_supabase().table("items").update({
+        "ai_score": 0,
+        "ai_verified": False,
+        "status": "pending_review",
+        "moderation_status": "pending_review",
+    }).eq("id", job["item_id"]).in_("status", list(UPDATABLE_ITEM_STATUSES)).execute()
+    if resp.data:
+        admin_stats.adjust(pending_reviews=1)
+    return result
+
+
+async def _run(job: dict) -> dict:
+    """Errors (images unreachable, verifier down) propagate: the runner retries the job."""
+    request = job["request"]
+    prefetched = None
+    duplicates: List[dict] = []
+    if job.get("item_id") and request.get("check_photos"):
+        prefetched = await verifier.fetch_images(request["image_urls"])
+        duplicates = await asyncio.to_thread(_check_photos, job, prefetched)
+        if any(not d["same_owner"] for d in duplicates):
+            return {"result": await asyncio.to_thread(_hold, job, duplicates)}
+
+    if request.get("ai_score") is not None:
+        verdict = {"confidence": request["ai_score"], "reason": "Score from upload verification", "cached": True}
+    else:
+        verdict = await verifier.verify_listing(
+            request["image_urls"], request["brand"], request.get("category"),
+            mode=request.get("mode"), threshold=request["threshold"], prefetched=prefetched,
+        )
+
+    confidence = verdict["confidence"]
+    verified = confidence >= request["threshold"]
+    result = {
+        "ai_score": confidence,
+        "verified": verified,
+        "status": "available" if verified else "pending_review",
+        "reason": verdict.get("reason", ""),
+        "cached": verdict.get("cached", False),
+        "images": verdict.get("images"),
+        "duplicates": duplicates,
+    }
+    if job.get("item_id"):
+        await asyncio.to_thread(_apply_to_item, job, result)
+    return {"result": result}
+
+
+_runner = JobRunner(
+    "verification_jobs", _run,
+    workers=WORKERS, stale_after=STALE_AFTER_SECONDS,
+    max_attempts=3, retry_base_seconds=10,
+    sweep_hook=_submit_orphans,
+)
+
+stop = _runner.stop
+stats = _runner.stats
+
+
+async def start(workers: int = WORKERS) -> None:
+    """Start the worker pool and the sweep for jobs left behind by other processes."""
+    _runner.workers = workers
+    await _runner.start()
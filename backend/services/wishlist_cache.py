@@ -0,0 +1,67 @@
+"""
+Per-user cached set of wishlisted item ids.
+
+Drawing heart icons needs "which of these cards are saved?" for a whole
+page at once. Each user's saved ids are loaded with one query, then kept
+current by the wishlist write endpoints. A TTL bounds staleness from other
+workers, and the least recently used users are dropped once MAX_USERS is hit.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Set
+
+TTL_SECONDS = int(os.environ.get("WISHLIST_CACHE_TTL", "300"))
+MAX_USERS = int(os.environ.get("WISHLIST_CACHE_USERS", "10000"))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, tuple]" = OrderedDict()   # user_id -> (expires_at, set of item ids)
+
+
+def _load(supabase, user_id: str) -> Set[str]:
+    resp = supabase.table("wishlists").select("item_id").eq("user_id", user_id).execute()
+    return {row["item_id"] for row in resp.data or []}
+
+
+def _saved_set(supabase, user_id: str) -> Set[str]:
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and entry[0] > now:
+            _entries.move_to_end(user_id)
+            return entry[1]
+
+    saved = _load(supabase, user_id)
+    with _lock:
+        _entries[user_id] = (time.monotonic() + TTL_SECONDS, saved)
+        _entries.move_to_end(user_id)
+        while len(_entries) > MAX_USERS:
+            _entries.popitem(last=False)
+    return saved
+
+
+def saved_subset(supabase, user_id: str, item_ids: Iterable[str]) -> List[str]:
+    """The ids from item_ids that user_id has saved, in input order."""
+    saved = _saved_set(supabase, user_id)
+    with _lock:
+        return [iid for iid in dict.fromkeys(item_ids) if iid in saved]
+
+
+def is_saved(supabase, user_id: str, item_id: str) -> bool:
+    return bool(saved_subset(supabase, user_id, [item_id]))
+
+
+def add(user_id: str, item_ids: Iterable[str]) -> None:
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry:
+            entry[1].update(item_ids)
+
+
+def remove(user_id: str, item_ids: Iterable[str]) -> None:
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry:
+            entry[1].difference_update(item_ids)
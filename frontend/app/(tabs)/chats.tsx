@@ -7,7 +7,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useFocusEffect, useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
 import { Colors } from '../../constants/Colors';
-import { authenticatedFetch } from '../../lib/api';
+import { syncConversations } from '../../lib/conversationSync';
 import { supabase } from '../../lib/supabase';
 import StatusBanner, { friendlyError } from '../../components/StatusBanner';
 
@@ -62,8 +62,7 @@ export default function ChatsScreen() {
 
     async function load() {
         try {
-            const data = await authenticatedFetch('/conversations');
-            setConvs(data || []);
+            setConvs(await syncConversations());
         } catch (e: any) {
             setBannerMsg(friendlyError(e?.message || String(e)));
         } finally {
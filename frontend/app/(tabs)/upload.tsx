@@ -9,7 +9,7 @@ import * as ImagePicker from 'expo-image-picker';
 import { Ionicons } from '@expo/vector-icons';
 import { Colors } from '../../constants/Colors';
 import { supabase } from '../../lib/supabase';
-import { authenticatedFetch } from '../../lib/api';
+import { authenticatedFetch, waitForVerificationJob } from '../../lib/api';
 import { useRouter } from 'expo-router';
 
 // ─── Constants ────────────────────────────────────────────────────────────────
@@ -168,33 +168,8 @@ export default function UploadScreen() {
                 publicUrls.push(url);
             }
 
-            // STEP 2: AI Verification (using brand-tag photo = index 1 if available)
-            setStep('verifying');
-            setStatusMsg('Verifying with AI…');
-
-            let aiScore = 0;
-            let aiVerified = false;
-            let aiReason = '';
-
-            try {
-                const verifyRes = await authenticatedFetch('/verify/item', {
-                    method: 'POST',
-                    body: JSON.stringify({ 
-                        brand: brand.trim(), 
-                        category: category || null, 
-                        image_urls: publicUrls 
-                    }),
-                });
-                aiScore = verifyRes.ai_score ?? 0;
-                aiVerified = verifyRes.verified ?? false;
-                aiReason = verifyRes.reason ?? '';
-            } catch (e: any) {
-                // AI failure is non-blocking — treat as pending_review
-                console.warn('AI verify failed:', e.message);
-                aiScore = 0;
-            }
-
-            // STEP 3: Create the item
+            // STEP 2: Create the item — AI verification (brand-tag photo = index 1 if available)
+            // runs as a background job on the server
             setStep('submitting');
             setStatusMsg('Publishing your item…');
 
@@ -210,10 +185,28 @@ export default function UploadScreen() {
                     size: size || null,
                     description: description.trim() || null,
                     images: publicUrls,
-                    ai_score: aiScore,
+                    verify_in_background: true,
                 }),
             });
 
+            // STEP 3: Wait for the verification job
+            setStep('verifying');
+            setStatusMsg('Verifying with AI…');
+
+            let aiScore = 0;
+            let aiVerified = false;
+            let aiReason = '';
+
+            try {
+                const verdict = result.job_id ? await waitForVerificationJob(result.job_id) : null;
+                aiScore = verdict?.ai_score ?? 0;
+                aiVerified = verdict?.verified ?? false;
+                aiReason = verdict?.reason ?? '';
+            } catch (e: any) {
+                // AI failure is non-blocking — the item stays in pending_review
+                console.warn('AI verify failed:', e.message);
+            }
+
             setStep('idle');
 
             // Show result alert
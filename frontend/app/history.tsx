@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { View, Text, StyleSheet, FlatList, TouchableOpacity, Image, ActivityIndicator } from 'react-native';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { Colors } from '../constants/Colors';
-import { authenticatedFetch } from '../lib/api';
+import { syncConversations } from '../lib/conversationSync';
 import { useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
 
@@ -34,8 +34,7 @@ export default function HistoryScreen() {
     async function loadHistory() {
         setLoading(true);
         try {
-            const data = await authenticatedFetch('/conversations');
-            setHistory(data || []);
+            setHistory(await syncConversations());
         } catch (e) {
             console.error(e);
         } finally {
@@ -7,7 +7,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useLocalSearchParams, useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
 import { Colors } from '../../constants/Colors';
-import { authenticatedFetch } from '../../lib/api';
+import { authenticatedFetch, waitForVerificationJob } from '../../lib/api';
 import { supabase } from '../../lib/supabase';
 
 const { width: SCREEN_W } = Dimensions.get('window');
@@ -44,8 +44,11 @@ export default function ItemDetailScreen() {
     async function handleReVerify() {
         setVerifying(true);
         try {
-            const result = await authenticatedFetch(`/items/${id}/re-verify`, { method: 'POST' });
-            if (result.verified) {
+            const { job_id } = await authenticatedFetch(`/items/${id}/re-verify`, { method: 'POST' });
+            const result = await waitForVerificationJob(job_id);
+            if (!result) {
+                Alert.alert('⏳ Still verifying', 'Verification is taking longer than usual. Check back in a moment.');
+            } else if (result.verified) {
                 Alert.alert('✅ Approved!', `AI Confidence: ${result.ai_score}%\n\nYour item is now live in the swap feed.`);
             } else {
                 Alert.alert('⏳ Still under review', `AI Confidence: ${result.ai_score}%\n${result.reason || ''}\n\nYou can also publish it manually.`);
@@ -42,3 +42,16 @@ export const authenticatedFetch = async (endpoint: string, options: RequestInit
 
     return response.json();
 };
+
+// Poll a background AI verification job until it finishes.
+// Resolves with the job's result ({ ai_score, verified, status, reason }) or null on failure/timeout.
+export const waitForVerificationJob = async (jobId: string, timeoutMs = 90000, intervalMs = 1500) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+        const job = await authenticatedFetch(`/verify/jobs/${jobId}`);
+        if (job.status === 'done') return job.result;
+        if (job.status === 'failed') return null;
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+    return null;
+};
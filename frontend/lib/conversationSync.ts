@@ -0,0 +1,38 @@
+import { authenticatedFetch } from './api';
+import { supabase } from './supabase';
+
+// Process-wide inbox snapshot shared by the chats tab and history screen.
+// The first sync uses the epoch watermark (full list); later syncs only
+// transfer conversations changed since the last watermark.
+const EPOCH = '1970-01-01T00:00:00+00:00';
+
+let cached: any[] = [];
+let watermark = EPOCH;
+
+function byLastMessage(a: any, b: any) {
+    return new Date(b.last_message_at || 0).getTime() - new Date(a.last_message_at || 0).getTime();
+}
+
+export async function syncConversations(): Promise<any[]> {
+    const data = await authenticatedFetch(`/conversations?since=${encodeURIComponent(watermark)}`);
+    const changed: any[] = data?.conversations || [];
+    const deleted = new Set<string>(data?.deleted || []);
+    const changedIds = new Set(changed.map(c => c.id));
+
+    cached = [
+        ...cached.filter(c => !changedIds.has(c.id) && !deleted.has(c.id)),
+        ...changed,
+    ].sort(byLastMessage);
+    watermark = data?.watermark || watermark;
+    return cached;
+}
+
+export function resetConversationSync() {
+    cached = [];
+    watermark = EPOCH;
+}
+
+// Never leak one account's inbox into the next session
+supabase.auth.onAuthStateChange((event) => {
+    if (event === 'SIGNED_OUT') resetConversationSync();
+});